@@ -6,16 +6,66 @@
 
 """Este módulo contiene funciones para calcular el costo total de las ventas."""
 
+import argparse
+import functools
+import hashlib
+import io
+import itertools
 import json
+import os
 import time
 import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import instrumentation
+except ImportError:
+    # Al ejecutarse desde esta carpeta la capa compartida está en la raíz.
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(
+        __file__))))
+    try:
+        import instrumentation
+    except ImportError:
+        import types
+
+        def _call_untallied(function, *args, **kwargs):
+            """Llama a la función sin recoger mediciones."""
+            return function(*args, **kwargs), None
+
+        def _ignore_arguments(parser):
+            """Acepta las opciones de la capa compartida sin usarlas."""
+            group = parser.add_argument_group('instrumentation (no '
+                                              'disponible, se ignora)')
+            group.add_argument('--metrics', metavar='FILE')
+            group.add_argument('--profile', metavar='FILE')
+            group.add_argument('--trace-memory', action='store_true')
+
+        # Sustituto sin efecto cuando el módulo compartido no está.
+        instrumentation = types.SimpleNamespace(
+            instrumented=lambda name: lambda function: function,
+            count=lambda name, value=1: None,
+            collecting=lambda function: functools.partial(_call_untallied,
+                                                          function),
+            merge=lambda tallies: None,
+            add_arguments=_ignore_arguments,
+            enable_from_arguments=lambda arguments: None,
+            finish=lambda: None,
+        )
+
+DUPLICATE_POLICIES = ('first', 'last', 'error')
+STREAM_CHUNK_SIZE = 1 << 16
+SHARD_SIZE = 100_000
+CHECKPOINT_TAIL_SIZE = 256
 
 
+@instrumentation.instrumented('compute_sales.load_data')
 def load_data(file_path):
     """Carga datos desde un archivo JSON."""
     try:
         with open(file_path, 'r') as file:
             data = json.load(file)
+        instrumentation.count('records', len(data))
         return data
     except FileNotFoundError:
         print(f"Advertencia: El archivo {file_path} no existe. "
@@ -27,41 +77,562 @@ def load_data(file_path):
         sys.exit(1)
 
 
-def compute_total_cost(catalog, sales):
+def _iter_json_array(file, decoder, offset=0, after_item=None):
+    """Genera los elementos de un arreglo JSON leyendo el archivo por bloques.
+
+    Cada elemento va con la posición en bytes del archivo justo después de
+    él. ``offset`` es la posición en bytes donde empieza ``file``; con
+    ``after_item`` en ``None`` se espera el ``[`` inicial y, si no, se
+    reanuda dentro del arreglo indicando si ya se leyó algún elemento.
+    """
+    buffer = file.read(STREAM_CHUNK_SIZE)
+    while buffer.isspace():
+        chunk = file.read(STREAM_CHUNK_SIZE)
+        if not chunk:
+            break
+        buffer += chunk
+    position = len(buffer) - len(buffer.lstrip())
+    if after_item is None:
+        if not buffer.startswith('[', position):
+            raise json.JSONDecodeError("Se esperaba un arreglo", buffer, 0)
+        position += 1
+        expect_item = True
+    else:
+        expect_item = not after_item
+    can_close = True
+    eof = False
+    mark, mark_offset = 0, offset
+
+    def advance(end):
+        nonlocal mark, mark_offset
+        mark_offset += len(buffer[mark:end].encode('utf-8'))
+        mark = end
+        return mark_offset
+
+    while True:
+        while position < len(buffer) and buffer[position].isspace():
+            position += 1
+        if position == len(buffer):
+            if eof:
+                raise json.JSONDecodeError("Arreglo sin cerrar", buffer,
+                                           position)
+            chunk = file.read(STREAM_CHUNK_SIZE)
+            eof = not chunk
+            advance(position)
+            buffer = buffer[position:] + chunk
+            position = mark = 0
+            continue
+        if buffer[position] == ']' and can_close:
+            return
+        if not expect_item:
+            if buffer[position] != ',':
+                raise json.JSONDecodeError("Se esperaba ','", buffer, position)
+            position += 1
+            expect_item = True
+            can_close = False
+            continue
+        try:
+            item, end = decoder.raw_decode(buffer, position)
+            # Un número cortado por el bloque ("3." de "3.5") también se
+            # decodifica: solo vale si le sigue un separador
+            complete = eof or (end < len(buffer) and (
+                buffer[end] in ',]' or buffer[end].isspace()))
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            complete = False
+        if not complete:
+            chunk = file.read(STREAM_CHUNK_SIZE)
+            eof = not chunk
+            advance(position)
+            buffer = buffer[position:] + chunk
+            position = mark = 0
+            continue
+        yield item, advance(end)
+        position = end
+        expect_item = False
+        can_close = True
+
+
+def detect_format(file_path):
+    """Indica si un archivo JSON es un arreglo (``'array'``) o JSON Lines.
+
+    Un archivo vacío o con solo espacios no es JSON válido en ningún
+    formato, igual que para ``load_data``.
+    """
+    with open(file_path, 'rb') as file:
+        first = file.read(1)
+        while first.isspace():
+            first = file.read(1)
+    if not first:
+        raise json.JSONDecodeError("Archivo vacío", '', 0)
+    return 'array' if first == b'[' else 'lines'
+
+
+def exit_malformed(file_path):
+    """Avisa de un archivo JSON mal formado y termina el programa."""
+    print(f"Error: No se decodifica el archivo {file_path}. "
+          " Asegúrate de que sea un archivo JSON válido.")
+    sys.exit(1)
+
+
+def iter_positioned_records(file_path, offset=0, records=0, json_format=None):
+    """Genera (registro, posición en bytes tras él, terminado) de un archivo.
+
+    Permite reanudar la lectura en ``offset`` después de ``records``
+    registros. Un registro de JSON Lines sin salto de línea final no está
+    terminado, porque el archivo todavía puede crecer por esa línea. Un
+    archivo inexistente no genera registros y uno mal formado termina el
+    programa, igual que ``load_data``.
+    """
+    try:
+        json_format = json_format or detect_format(file_path)
+        with open(file_path, 'rb') as file:
+            file.seek(offset)
+            if json_format == 'array':
+                # Sin traducir saltos de línea, para que las posiciones en
+                # bytes cuenten también los \r de un archivo CRLF
+                text = io.TextIOWrapper(file, encoding='utf-8', newline='')
+                after_item = None if offset == 0 else records > 0
+                for record, end in _iter_json_array(text, json.JSONDecoder(),
+                                                    offset, after_item):
+                    yield record, end, True
+            else:
+                for line in file:
+                    offset += len(line)
+                    if line.strip():
+                        yield json.loads(line), offset, line.endswith(b'\n')
+    except FileNotFoundError:
+        print(f"Advertencia: El archivo {file_path} no existe. "
+              "Se utilizarán valores predeterminados.")
+    except json.JSONDecodeError:
+        exit_malformed(file_path)
+
+
+def iter_records(file_path):
+    """Genera los registros de un archivo JSON uno a uno con memoria acotada.
+
+    Acepta un arreglo JSON en el nivel superior, que se analiza de forma
+    incremental, o JSON Lines (un objeto por línea).
+    """
+    for record, _, _ in iter_positioned_records(file_path):
+        yield record
+
+
+@instrumentation.instrumented('compute_sales.build_catalog_index')
+def build_catalog_index(catalog, duplicates='first'):
+    """Construye un índice título -> precio a partir del catálogo.
+
+    ``duplicates`` decide qué hacer con títulos repetidos: ``'first'``
+    conserva el primero (como la búsqueda lineal original), ``'last'`` el
+    último y ``'error'`` lanza ``ValueError``.
+    """
+    if duplicates not in DUPLICATE_POLICIES:
+        raise ValueError(f"Política de duplicados desconocida: {duplicates}")
+    index = {}
+    for product in catalog:
+        title = product['title']
+        if title in index:
+            if duplicates == 'first':
+                continue
+            if duplicates == 'error':
+                raise ValueError(f"Título duplicado en el catálogo: {title}")
+        index[title] = product['price']
+    return index
+
+
+def save_catalog_index(index, file_path, duplicates='first'):
+    """Guarda el índice del catálogo en un archivo JSON.
+
+    Se guarda la política de duplicados con la que se construyó y los pares
+    (título, precio) como lista, porque las claves de un objeto JSON siempre
+    son cadenas y los títulos que no lo son dejarían de coincidir.
+    """
+    with open(file_path, 'w', encoding='utf-8') as file:
+        json.dump({'duplicates': duplicates, 'entries': list(index.items())},
+                  file)
+
+
+def load_catalog_index(catalog_file, index_file, duplicates='first'):
+    """Carga el índice guardado o lo reconstruye.
+
+    Se reconstruye si el catálogo es más nuevo, si el índice se construyó con
+    otra política de duplicados o si el archivo no tiene el formato esperado.
+    """
+    try:
+        if os.path.getmtime(index_file) >= os.path.getmtime(catalog_file):
+            with open(index_file, 'r', encoding='utf-8') as file:
+                saved = json.load(file)
+            if saved['duplicates'] == duplicates:
+                return {title: price for title, price in saved['entries']}
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    index = build_catalog_index(load_data(catalog_file), duplicates)
+    save_catalog_index(index, index_file, duplicates)
+    return index
+
+
+@instrumentation.instrumented('compute_sales.compute_total_cost')
+def compute_total_cost(catalog, sales, catalog_index=None):
     """Calcula el costo total de las ventas."""
+    if catalog_index is None:
+        catalog_index = build_catalog_index(catalog)
     total_cost = 0
     for sale in sales:
         product_name = sale['Product']
         quantity = sale['Quantity']
 
-        # Buscar el producto en el catálogo por nombre
-        matching_products = [product for product in catalog
-                             if product['title'] == product_name]
-
-        if matching_products:
-            product = matching_products[0]
-            total_cost += product['price'] * quantity
+        # Buscar el producto en el índice del catálogo por nombre
+        if product_name in catalog_index:
+            total_cost += catalog_index[product_name] * quantity
         else:
-            print(f"Advertencia: El producto {product_name} "
-                  "no se encuentra en el catálogo.")
+            warn_missing_product(product_name)
 
     return total_cost
 
 
+def warn_missing_product(product_name):
+    """Avisa de una venta cuyo producto no está en el catálogo."""
+    instrumentation.count('missing_products')
+    print(f"Advertencia: El producto {product_name} "
+          "no se encuentra en el catálogo.")
+
+
+class CompensatedSum:
+    """Suma con compensación de Neumaier que se puede combinar con otras.
+
+    Los términos enteros se acumulan aparte de forma exacta, de modo que una
+    suma de enteros sigue siendo un entero como en ``compute_total_cost``.
+    """
+
+    def __init__(self):
+        """Crea una suma vacía."""
+        self.integer = 0
+        self.total = 0.0
+        self.compensation = 0.0
+        self.has_float = False
+
+    def add(self, value):
+        """Suma un término."""
+        if isinstance(value, int):
+            self.integer += value
+            return
+        self.has_float = True
+        total = self.total + value
+        if abs(self.total) >= abs(value):
+            self.compensation += (self.total - total) + value
+        else:
+            self.compensation += (value - total) + self.total
+        self.total = total
+
+    def merge(self, other):
+        """Suma los términos acumulados por otra suma."""
+        self.integer += other.integer
+        if other.has_float:
+            self.add(other.total)
+            self.add(other.compensation)
+
+    def state(self):
+        """Devuelve el estado de la suma como diccionario serializable."""
+        return {
+            'integer': self.integer,
+            'total': self.total,
+            'compensation': self.compensation,
+            'has_float': self.has_float,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        """Reconstruye una suma a partir de ``state()``."""
+        compensated = cls()
+        compensated.integer = state['integer']
+        compensated.total = state['total']
+        compensated.compensation = state['compensation']
+        compensated.has_float = state['has_float']
+        return compensated
+
+    def value(self):
+        """Devuelve el resultado de la suma."""
+        if not self.has_float:
+            return self.integer
+        return self.integer + (self.total + self.compensation)
+
+
+class SalesAggregate:
+    """Totales parciales de un grupo de ventas que se pueden combinar.
+
+    Lleva el total, los ingresos y la cantidad por producto, los productos
+    no encontrados en el orden de las ventas y el total de cada fragmento.
+    """
+
+    def __init__(self):
+        """Crea un agregado vacío."""
+        self.total = CompensatedSum()
+        self.products = {}
+        self.missing = []
+        self.shards = []
+
+    def add_sale(self, product_name, quantity, catalog_index):
+        """Acumula una venta."""
+        if product_name not in catalog_index:
+            self.missing.append(product_name)
+            return
+        revenue = catalog_index[product_name] * quantity
+        self.total.add(revenue)
+        if product_name not in self.products:
+            self.products[product_name] = [CompensatedSum(), 0]
+        breakdown = self.products[product_name]
+        breakdown[0].add(revenue)
+        breakdown[1] += quantity
+
+    def merge(self, other):
+        """Combina otro agregado, que debe ir después de este en las ventas."""
+        self.total.merge(other.total)
+        for product_name, (revenue, quantity) in other.products.items():
+            if product_name not in self.products:
+                self.products[product_name] = [CompensatedSum(), 0]
+            breakdown = self.products[product_name]
+            breakdown[0].merge(revenue)
+            breakdown[1] += quantity
+        self.missing.extend(other.missing)
+        self.shards.extend(other.shards)
+
+
+_WORKER_CATALOG_INDEX = {}
+
+
+def _init_worker(catalog_index):
+    """Recibe el índice del catálogo una sola vez por proceso."""
+    global _WORKER_CATALOG_INDEX  # pylint: disable=global-statement
+    _WORKER_CATALOG_INDEX = catalog_index
+
+
+@instrumentation.instrumented('compute_sales.aggregate_shard')
+def aggregate_shard(shard_number, shard, catalog_index=None):
+    """Agrega un fragmento de ventas dado como pares (producto, cantidad)."""
+    if catalog_index is None:
+        catalog_index = _WORKER_CATALOG_INDEX
+    aggregate = SalesAggregate()
+    for product_name, quantity in shard:
+        aggregate.add_sale(product_name, quantity, catalog_index)
+    aggregate.shards.append((shard_number, aggregate.total.value()))
+    return aggregate
+
+
+def _iter_shards(sales, shard_size):
+    """Agrupa las ventas en fragmentos de pares (producto, cantidad)."""
+    sales = iter(sales)
+    while True:
+        shard = [(sale['Product'], sale['Quantity'])
+                 for sale in itertools.islice(sales, shard_size)]
+        if not shard:
+            return
+        yield shard
+
+
+def compute_sales_breakdown(catalog_index, sales, workers=None,
+                            shard_size=SHARD_SIZE):
+    """Calcula el total y los desgloses repartiendo las ventas en procesos.
+
+    Las ventas se parten en fragmentos de ``shard_size`` registros y se
+    combinan en su orden original, así que el resultado no depende del
+    número de procesos. Los avisos de productos no encontrados se imprimen
+    en el mismo orden que en ``compute_total_cost``.
+    """
+    workers = workers or os.cpu_count() or 1
+    result = SalesAggregate()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(catalog_index,)) as executor:
+        aggregate = instrumentation.collecting(aggregate_shard)
+        tasks = (executor.submit(aggregate, shard_number, shard)
+                 for shard_number, shard
+                 in enumerate(_iter_shards(sales, shard_size)))
+        pending = deque(itertools.islice(tasks, workers * 2))
+        while pending:
+            partial, tallies = pending.popleft().result()
+            pending.extend(itertools.islice(tasks, 1))
+            instrumentation.merge(tallies)
+            for product_name in partial.missing:
+                warn_missing_product(product_name)
+            result.merge(partial)
+    return result
+
+
+def format_breakdown(aggregate):
+    """Da formato a los desgloses por producto y por fragmento."""
+    lines = ["Desglose por producto:"]
+    for product_name, (revenue, quantity) in aggregate.products.items():
+        lines.append(f"{product_name}: ingresos {revenue.value()}, "
+                     f"cantidad {quantity}")
+    lines.append("Desglose por fragmento:")
+    for shard_number, shard_total in aggregate.shards:
+        lines.append(f"Fragmento {shard_number}: {shard_total}")
+    missing = list(dict.fromkeys(aggregate.missing))
+    lines.append(f"Productos no encontrados: {missing}")
+    return '\n'.join(lines) + '\n'
+
+
+def catalog_fingerprint(catalog_index):
+    """Calcula una huella del índice del catálogo para detectar cambios.
+
+    Se usa ``repr`` para conservar los tipos: el título ``1`` y el título
+    ``"1"`` son distintos y pueden mezclarse en el mismo catálogo.
+    """
+    serialized = repr(sorted(catalog_index.items(), key=repr)).encode('utf-8')
+    return hashlib.blake2b(serialized, digest_size=16).hexdigest()
+
+
+def _tail_digest(file_path, offset):
+    """Calcula una huella de los bytes que preceden a ``offset``."""
+    with open(file_path, 'rb') as file:
+        start = max(0, offset - CHECKPOINT_TAIL_SIZE)
+        file.seek(start)
+        tail = file.read(offset - start)
+    return hashlib.blake2b(tail, digest_size=16).hexdigest()
+
+
+def load_checkpoint(checkpoint_file, sales_file, fingerprint):
+    """Carga el punto de control si sigue siendo válido para las ventas.
+
+    Devuelve ``None`` si no existe, es de otro archivo de ventas, el
+    catálogo cambió o la parte ya procesada del archivo fue modificada.
+    """
+    try:
+        with open(checkpoint_file, 'r', encoding='utf-8') as file:
+            checkpoint = json.load(file)
+        if checkpoint['sales_file'] != sales_file:
+            return None
+        if checkpoint['catalog_fingerprint'] != fingerprint:
+            print("Aviso: El catálogo cambió; se recalcula el total completo.")
+            return None
+        offset = checkpoint['offset']
+        if (os.path.getsize(sales_file) < offset
+                or _tail_digest(sales_file, offset) != checkpoint['tail']):
+            print("Aviso: Las ventas ya procesadas cambiaron; se recalcula "
+                  "el total completo.")
+            return None
+        return checkpoint
+    except (OSError, KeyError, TypeError, json.JSONDecodeError):
+        return None
+
+
+@instrumentation.instrumented('compute_sales.compute_total_incremental')
+def compute_total_incremental(catalog_index, sales_file, checkpoint_file):
+    """Calcula el total procesando solo las ventas nuevas desde la última vez.
+
+    El punto de control guarda la posición en bytes, el número de registros,
+    el total acumulado y la huella del catálogo; si la huella no coincide se
+    recalcula todo. Solo se avisa de los productos no encontrados nuevos.
+    """
+    fingerprint = catalog_fingerprint(catalog_index)
+    checkpoint = load_checkpoint(checkpoint_file, sales_file, fingerprint)
+    if checkpoint is None:
+        checkpoint = {'offset': 0, 'records': 0, 'format': None,
+                      'total': CompensatedSum().state()}
+    total = CompensatedSum.from_state(checkpoint['total'])
+    pending = CompensatedSum()
+    offset = checkpoint['offset']
+    records = checkpoint['records']
+    json_format = checkpoint['format']
+    if json_format is None and os.path.exists(sales_file):
+        try:
+            json_format = detect_format(sales_file)
+        except json.JSONDecodeError:
+            exit_malformed(sales_file)
+
+    for sale, end, complete in iter_positioned_records(
+            sales_file, offset, records, json_format):
+        product_name = sale['Product']
+        if product_name in catalog_index:
+            revenue = catalog_index[product_name] * sale['Quantity']
+            (total if complete else pending).add(revenue)
+        else:
+            warn_missing_product(product_name)
+        if complete:
+            offset, records = end, records + 1
+
+    if json_format is not None:
+        with open(checkpoint_file, 'w', encoding='utf-8') as file:
+            json.dump({
+                'sales_file': sales_file,
+                'format': json_format,
+                'offset': offset,
+                'records': records,
+                'tail': _tail_digest(sales_file, offset),
+                'catalog_fingerprint': fingerprint,
+                'total': total.state(),
+            }, file)
+    total.merge(pending)
+    return total.value()
+
+
+def format_sales_results(total_cost, elapsed_time, breakdown=None):
+    """Da formato al texto que se guarda en SalesResults.txt."""
+    text = (f"Costo total de las ventas: {total_cost}\n"
+            f"Tiempo transcurrido: {elapsed_time} segundos\n")
+    return text if breakdown is None else text + breakdown
+
+
+def parse_arguments():
+    """Interpreta las opciones de la línea de comandos."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--duplicates', choices=DUPLICATE_POLICIES,
+                        default='first',
+                        help='qué precio usar si un título se repite')
+    parser.add_argument('--catalog-index', default=None,
+                        help='archivo donde guardar y reutilizar el índice '
+                             'del catálogo entre ejecuciones')
+    parser.add_argument('--stream', action='store_true',
+                        help='leer las ventas registro a registro (arreglo '
+                             'JSON o JSON Lines) con memoria acotada')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='repartir las ventas entre procesos y guardar '
+                             'los desgloses por producto y por fragmento')
+    parser.add_argument('--incremental', action='store_true',
+                        help='procesar solo las ventas añadidas desde la '
+                             'última ejecución')
+    parser.add_argument('--checkpoint', default='SalesCheckpoint.json',
+                        help='archivo del punto de control incremental')
+    instrumentation.add_arguments(parser)
+    return parser.parse_args()
+
+
 def main():
     """Función principal que calcula el costo total de las ventas."""
+    arguments = parse_arguments()
+    instrumentation.enable_from_arguments(arguments)
     # Asignar nombres de archivo directamente
     catalog_file = 'TC1/priceCatalogue_default.json'
     sales_file = 'TC1/salesRecord_default.json'
 
-    start_time = time.time()
+    start_time = time.perf_counter()
 
-    catalog = load_data(catalog_file)
-    sales = load_data(sales_file)
+    if arguments.catalog_index:
+        catalog_index = load_catalog_index(catalog_file,
+                                           arguments.catalog_index,
+                                           arguments.duplicates)
+    else:
+        catalog_index = build_catalog_index(load_data(catalog_file),
+                                            arguments.duplicates)
+    breakdown = None
+    if arguments.incremental:
+        total_cost = compute_total_incremental(catalog_index, sales_file,
+                                               arguments.checkpoint)
+    else:
+        if arguments.stream:
+            sales = iter_records(sales_file)
+        else:
+            sales = load_data(sales_file)
 
-    total_cost = compute_total_cost(catalog, sales)
+        if arguments.workers:
+            aggregate = compute_sales_breakdown(catalog_index, sales,
+                                                arguments.workers)
+            total_cost = aggregate.total.value()
+            breakdown = format_breakdown(aggregate)
+        else:
+            total_cost = compute_total_cost(None, sales, catalog_index)
 
-    end_time = time.time()
+    end_time = time.perf_counter()
     elapsed_time = end_time - start_time
 
     # Imprimir resultados en pantalla
@@ -70,8 +641,9 @@ def main():
 
     # Guardar resultados en SalesResults.txt
     with open('SalesResults.txt', 'w') as result_file:
-        result_file.write(f"Costo total de las ventas: {total_cost}\n")
-        result_file.write(f"Tiempo transcurrido: {elapsed_time} segundos\n")
+        result_file.write(format_sales_results(total_cost, elapsed_time,
+                                               breakdown))
+    instrumentation.finish()
 
 
 if __name__ == "__main__":
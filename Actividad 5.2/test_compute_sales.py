@@ -0,0 +1,187 @@
+"""Unit tests for the streaming readers of compute_sales."""
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import compute_sales
+
+
+class StreamingTestCase(unittest.TestCase):
+    """Writes sales files in a temporary directory."""
+    def setUp(self):
+        """Create the temporary directory."""
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'sales.json')
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        shutil.rmtree(self.directory)
+
+    def write(self, text, mode='w'):
+        """Write ``text`` to the sales file."""
+        with open(self.path, mode, encoding='utf-8') as file:
+            file.write(text)
+
+    def read_positioned(self):
+        """Return the positioned records of the sales file, quietly."""
+        with contextlib.redirect_stdout(io.StringIO()):
+            return list(compute_sales.iter_positioned_records(self.path))
+
+    def assert_malformed(self):
+        """Check that reading the sales file exits with status 1."""
+        output = io.StringIO()
+        with self.assertRaises(SystemExit) as raised, \
+                contextlib.redirect_stdout(output):
+            list(compute_sales.iter_positioned_records(self.path))
+        self.assertEqual(raised.exception.code, 1)
+        self.assertIn("No se decodifica", output.getvalue())
+
+
+class TestJsonArray(StreamingTestCase):
+    """Tests for the incremental JSON array parser."""
+    def test_items_across_chunk_boundaries(self):
+        """Every chunk size gives the same items and byte offsets."""
+        items = [{"Product": "Café ñandú", "Quantity": 2},
+                 {"Product": "b", "Quantity": [1, {"x": "]"}]},
+                 "texto, con [corchetes]", 3.5, 123456, -2.5e-07, None]
+        encoded = [json.dumps(item, ensure_ascii=False) for item in items]
+        text = ' [\n  ' + ',\n  '.join(encoded) + '\n]\n'
+        self.write(text)
+        ends = []
+        prefix = text[:text.index('[') + 1]
+        for number, item in enumerate(encoded):
+            prefix += ('\n  ' if number == 0 else ',\n  ') + item
+            ends.append(len(prefix.encode('utf-8')))
+        expected = [(item, end, True) for item, end in zip(items, ends)]
+        for chunk_size in (1, 2, 3, 5, 8, 64, 1 << 16):
+            with self.subTest(chunk_size=chunk_size), \
+                    mock.patch.object(compute_sales, 'STREAM_CHUNK_SIZE',
+                                      chunk_size):
+                self.assertEqual(self.read_positioned(), expected)
+
+    def test_empty_array(self):
+        """An empty array has no records."""
+        self.write('[ ]')
+        self.assertEqual(self.read_positioned(), [])
+
+    def test_malformed_arrays(self):
+        """Broken arrays are reported as malformed files."""
+        for text in ('[1 2]', '[1,]', '[,1]', '[1, 2', '[{"a": 1}',
+                     '[1, {"a": }]'):
+            with self.subTest(text=text), \
+                    mock.patch.object(compute_sales, 'STREAM_CHUNK_SIZE', 2):
+                self.write(text)
+                self.assert_malformed()
+
+
+class TestJsonLines(StreamingTestCase):
+    """Tests for JSON Lines files."""
+    def test_partial_last_line(self):
+        """A last line without a newline is read but not complete."""
+        self.write('{"Product": "a", "Quantity": 1}\n\n'
+                   '{"Product": "b", "Quantity": 2}')
+        records = self.read_positioned()
+        self.assertEqual([record for record, _, _ in records],
+                         [{"Product": "a", "Quantity": 1},
+                          {"Product": "b", "Quantity": 2}])
+        self.assertEqual([complete for _, _, complete in records],
+                         [True, False])
+        self.assertEqual(records[-1][1], os.path.getsize(self.path))
+
+    def test_empty_files_are_malformed(self):
+        """Empty or blank files are not taken as empty JSON Lines."""
+        for text in ('', ' \n\t\n'):
+            with self.subTest(text=text):
+                self.write(text)
+                self.assert_malformed()
+
+
+class TestIncrementalTotal(StreamingTestCase):
+    """Tests for resuming the total from a checkpoint."""
+    CATALOG = {"a": 1.5, "b": 2.0}
+
+    def setUp(self):
+        """Use a checkpoint next to the sales file."""
+        super().setUp()
+        self.checkpoint = os.path.join(self.directory, 'checkpoint.json')
+
+    def total(self):
+        """Run the incremental total and return it with its warnings."""
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            total = compute_sales.compute_total_incremental(
+                self.CATALOG, self.path, self.checkpoint)
+        return total, output.getvalue()
+
+    @staticmethod
+    def sale(product, quantity):
+        """Return one sale as a JSON line without its newline."""
+        return json.dumps({"Product": product, "Quantity": quantity})
+
+    def test_resume_after_appended_sales(self):
+        """Only the sales after the checkpoint are read again."""
+        self.write(self.sale("a", 2) + '\n' + self.sale("x", 1) + '\n')
+        total, output = self.total()
+        self.assertEqual(total, 3.0)
+        self.assertEqual(output.count("no se encuentra"), 1)
+
+        self.write(self.sale("b", 3) + '\n', mode='a')
+        with mock.patch.object(compute_sales, 'iter_positioned_records',
+                               wraps=compute_sales.iter_positioned_records
+                               ) as read:
+            total, output = self.total()
+        self.assertEqual(total, 9.0)
+        self.assertEqual(output, "")
+        self.assertGreater(read.call_args.args[1], 0)
+
+    def test_partial_line_is_counted_until_completed(self):
+        """A partial last line counts now and is read again once complete."""
+        self.write(self.sale("a", 2) + '\n' + self.sale("b", 1))
+        self.assertEqual(self.total()[0], 5.0)
+        self.write('\n' + self.sale("b", 1) + '\n', mode='a')
+        self.assertEqual(self.total()[0], 7.0)
+        self.assertEqual(self.total()[0], 7.0)
+
+    def test_resume_crlf_array(self):
+        """Offsets in a CRLF array count the carriage returns."""
+        sales = [self.sale("a", 2), self.sale("b", 1)]
+        with open(self.path, 'wb') as file:
+            file.write(('[\r\n  ' + ',\r\n  '.join(sales)
+                        + '\r\n]\r\n').encode('utf-8'))
+        self.assertEqual(self.total()[0], 5.0)
+        with open(self.checkpoint, 'r', encoding='utf-8') as file:
+            offset = json.load(file)['offset']
+        with open(self.path, 'rb') as file:
+            self.assertEqual(file.read()[offset - 1:offset], b'}')
+        total, output = self.total()
+        self.assertEqual(total, 5.0)
+        self.assertNotIn("No se decodifica", output)
+
+    def test_mixed_title_types(self):
+        """Titles of different types neither fail nor collide."""
+        self.assertNotEqual(compute_sales.catalog_fingerprint({1: 2.0}),
+                            compute_sales.catalog_fingerprint({"1": 2.0}))
+        compute_sales.catalog_fingerprint({1: 2.0, "a": 1.0})
+
+    def test_metrics_option(self):
+        """--metrics is accepted when run from this folder."""
+        with mock.patch('sys.argv', ['compute_sales.py', '--metrics', '-']):
+            self.assertEqual(compute_sales.parse_arguments().metrics, '-')
+
+    def test_changed_catalog_recomputes(self):
+        """A checkpoint for another catalog is not reused."""
+        self.write(self.sale("a", 2) + '\n')
+        self.total()
+        self.CATALOG = {"a": 10.0}  # pylint: disable=invalid-name
+        total, output = self.total()
+        self.assertEqual(total, 20.0)
+        self.assertIn("El catálogo cambió", output)
+
+
+if __name__ == '__main__':
+    unittest.main()
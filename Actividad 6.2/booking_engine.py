@@ -0,0 +1,140 @@
+"""Concurrency-safe booking engine built on top of hotel_management.Hotel."""
+
+import asyncio
+import random
+import sys
+import threading
+import time
+
+from hotel_management import Hotel, Room
+
+
+class BookingEngine:
+    """Serializes bookings per room with a fixed set of striped locks.
+
+    Each room number maps to one of ``stripes`` locks, so bookings of
+    different rooms rarely wait for each other while the check-then-set on
+    ``is_occupied`` of a single room can never interleave.
+    """
+
+    def __init__(self, hotel, stripes=64):
+        """Wrap a hotel, guarding its rooms with ``stripes`` locks."""
+        self.hotel = hotel
+        self._locks = [threading.Lock() for _ in range(stripes)]
+
+    def _stripe(self, room_number):
+        """Return the index of the lock guarding a room number."""
+        return hash(room_number) % len(self._locks)
+
+    def reserve_room(self, room_number):
+        """Reserve a room by its number, safely across threads."""
+        with self._locks[self._stripe(room_number)]:
+            return self.hotel.reserve_room(room_number)
+
+    def cancel_reservation(self, room_number):
+        """Cancel the reservation of a room, safely across threads."""
+        with self._locks[self._stripe(room_number)]:
+            return self.hotel.cancel_reservation(room_number)
+
+    def reserve_rooms(self, room_numbers):
+        """Reserve several rooms at once, or none of them.
+
+        The locks of every room involved are taken in a fixed order, so
+        concurrent batches cannot deadlock. If any room does not exist, is
+        occupied or is repeated, ``ValueError`` is raised and nothing is
+        reserved.
+        """
+        room_numbers = list(room_numbers)
+        if len(set(room_numbers)) != len(room_numbers):
+            raise ValueError("La habitación ya está ocupada.")
+        stripes = sorted({self._stripe(number) for number in room_numbers})
+        for stripe in stripes:
+            self._locks[stripe].acquire()
+        try:
+            for number in room_numbers:
+                room = self.hotel.get_room(number)
+                if room is None:
+                    raise ValueError("La habitación no existe.")
+                if room.is_occupied:
+                    raise ValueError("La habitación ya está ocupada.")
+            return [self.hotel.reserve_room(number) for number in room_numbers]
+        finally:
+            for stripe in reversed(stripes):
+                self._locks[stripe].release()
+
+    async def reserve_room_async(self, room_number):
+        """Reserve a room without blocking the event loop."""
+        return await asyncio.to_thread(self.reserve_room, room_number)
+
+    async def cancel_reservation_async(self, room_number):
+        """Cancel a reservation without blocking the event loop."""
+        return await asyncio.to_thread(self.cancel_reservation, room_number)
+
+    async def reserve_rooms_async(self, room_numbers):
+        """Reserve several rooms, all or none, without blocking the loop."""
+        return await asyncio.to_thread(self.reserve_rooms, room_numbers)
+
+
+def _book_randomly(engine, room_count, attempts, seed, booked):
+    """Try ``attempts`` random reservations, appending each success."""
+    generator = random.Random(seed)
+    for _ in range(attempts):
+        number = generator.randrange(room_count)
+        try:
+            engine.reserve_room(number)
+        except ValueError:
+            continue
+        booked.append(number)
+
+
+def _stress_run(room_count, thread_count, attempts_per_thread, seed):
+    """Run one round of the stress benchmark with ``thread_count`` threads.
+
+    Returns ``(elapsed seconds, double bookings)``.
+    """
+    hotel = Hotel("Stress Hotel", "Benchmark")
+    for number in range(room_count):
+        hotel.add_room(Room(number, 100 + number % 50))
+    engine = BookingEngine(hotel)
+    booked = [[] for _ in range(thread_count)]
+    workers = [
+        threading.Thread(target=_book_randomly,
+                         args=(engine, room_count, attempts_per_thread,
+                               seed + index, booked[index]))
+        for index in range(thread_count)
+    ]
+    start_time = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed_time = time.perf_counter() - start_time
+
+    successes = [number for numbers in booked for number in numbers]
+    return elapsed_time, len(successes) - len(set(successes))
+
+
+def stress_benchmark(room_count=10000, thread_counts=(1, 2, 4, 8),
+                     attempts_per_thread=20000, seed=0):
+    """Hammer the engine with random bookings from several threads.
+
+    Every successful reservation is recorded; since nothing is cancelled, a
+    room booked twice shows up as a double booking. Returns a list of
+    ``(threads, operations per second, double bookings)``.
+    """
+    results = []
+    for thread_count in thread_counts:
+        elapsed_time, double_bookings = _stress_run(
+            room_count, thread_count, attempts_per_thread, seed)
+        operations = thread_count * attempts_per_thread
+        results.append((thread_count, operations / elapsed_time,
+                        double_bookings))
+    return results
+
+
+if __name__ == '__main__':
+    # Reduce the switch interval so threads interleave as much as possible
+    sys.setswitchinterval(1e-6)
+    for used_threads, throughput, doubles in stress_benchmark():
+        print(f"Threads: {used_threads}, Operations/s: {throughput:.0f}, "
+              f"Double bookings: {doubles}")
@@ -0,0 +1,264 @@
+"""Write-ahead-log persistence for hotels.
+
+Instead of rewriting the whole hotel on every save, each change is
+appended to a journal as one JSON line. Periodic snapshots compact the
+journal, and recovery loads the last snapshot and replays the journal
+entries written after it.
+
+Files used for a journal at ``path``:
+
+* ``path.snapshot.json``: the hotel in Hotel.to_dict format plus the
+  sequence number of the last event it includes.
+* ``path.log``: one JSON event per line, each with its sequence number.
+"""
+
+import json
+import os
+import threading
+import time
+
+from hotel_management import (Reservation, Room, hotel_from_dict,
+                              iter_hotel_json)
+
+
+class JournalOptions:
+    # pylint: disable=too-few-public-methods
+    """How often a journal commits and compacts its log."""
+
+    __slots__ = ('commit_every', 'commit_interval', 'snapshot_every')
+
+    def __init__(self, commit_every=64, commit_interval=0.05,
+                 snapshot_every=10000):
+        """Set the group-commit batch, its timer and the snapshot period."""
+        self.commit_every = commit_every
+        self.commit_interval = commit_interval
+        self.snapshot_every = snapshot_every
+
+
+class HotelJournal:
+    # The log, its lock and the pending group commit are one unit of state.
+    # pylint: disable=too-many-instance-attributes
+    """Applies changes to a hotel and records them in an append-only log.
+
+    Every event is handed to the operating system as soon as it is applied,
+    so a crash of the process loses nothing. ``fsync`` is batched (group
+    commit): it runs once ``commit_every`` events are pending or, from a
+    timer thread, ``commit_interval`` seconds after the first pending
+    event, and on ``commit`` and ``close``. A snapshot is taken every
+    ``snapshot_every`` events. The three settings are a JournalOptions.
+    """
+
+    def __init__(self, hotel, path, sequence=0, options=None):
+        """Wrap a hotel whose state already includes event ``sequence``.
+
+        Use ``create`` or ``recover`` instead of calling this directly.
+        """
+        self.hotel = hotel
+        self.path = path
+        self.sequence = sequence
+        self.options = options or JournalOptions()
+        self._events_since_snapshot = 0
+        self._pending = 0
+        self._last_commit = time.monotonic()
+        self._lock = threading.Lock()
+        self._timer = None
+        # pylint: disable-next=consider-using-with
+        self._log = open(self.log_path(path), 'a', encoding='utf-8')
+
+    @staticmethod
+    def snapshot_path(path):
+        """Return the snapshot file of a journal."""
+        return f"{path}.snapshot.json"
+
+    @staticmethod
+    def log_path(path):
+        """Return the log file of a journal."""
+        return f"{path}.log"
+
+    @classmethod
+    def create(cls, hotel, path, **options):
+        """Start a new journal at ``path`` from the current hotel state.
+
+        ``options`` are the keyword arguments of JournalOptions.
+        """
+        _write_snapshot(hotel, path, 0)
+        with open(cls.log_path(path), 'w', encoding='utf-8'):
+            pass
+        return cls(hotel, path, 0, JournalOptions(**options))
+
+    @classmethod
+    def recover(cls, path, **options):
+        """Load the last snapshot and replay the log written after it."""
+        with open(cls.snapshot_path(path), 'r', encoding='utf-8') as file:
+            data = json.load(file)
+        hotel = hotel_from_dict(data)
+        sequence = data['sequence']
+        valid_size = 0
+        try:
+            with open(cls.log_path(path), 'rb') as file:
+                for line in file:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        break  # Línea incompleta de una escritura interrumpida
+                    if not line.endswith(b'\n'):
+                        break
+                    valid_size += len(line)
+                    if event['seq'] > sequence:
+                        _apply(hotel, event)
+                        sequence = event['seq']
+            os.truncate(cls.log_path(path), valid_size)
+        except FileNotFoundError:
+            pass
+        return cls(hotel, path, sequence, JournalOptions(**options))
+
+    def add_room(self, room):
+        """Add a room to the hotel and record it."""
+        with self._lock:
+            self.hotel.add_room(room)
+            self._record({'op': 'add_room', 'number': room.number,
+                          'price': room.price,
+                          'is_occupied': room.is_occupied})
+
+    def reserve_room(self, room_number):
+        """Reserve a room and record the reservation."""
+        with self._lock:
+            message = self.hotel.reserve_room(room_number)
+            self._record({'op': 'reserve', 'number': room_number})
+        return message
+
+    def cancel_reservation(self, room_number):
+        """Cancel a reservation and record the cancellation."""
+        with self._lock:
+            message = self.hotel.cancel_reservation(room_number)
+            self._record({'op': 'cancel', 'number': room_number})
+        return message
+
+    def book_room(self, room_number, customer, check_in, check_out):
+        """Book a room for some nights and record the booking."""
+        with self._lock:
+            reservation = self.hotel.book_room(room_number, customer,
+                                               check_in, check_out)
+            self._record({'op': 'book',
+                          'reservation': reservation.to_dict()})
+        return reservation
+
+    def cancel_booking(self, reservation):
+        """Cancel a booking and record the cancellation."""
+        with self._lock:
+            self.hotel.cancel_booking(reservation)
+            self._record({'op': 'cancel_booking',
+                          'reservation': reservation.to_dict()})
+
+    def _record(self, event):
+        """Append an event to the log, committing and compacting as due.
+
+        The caller holds the lock, so events are logged in the order they
+        were applied.
+        """
+        self.sequence += 1
+        event['seq'] = self.sequence
+        self._log.write(json.dumps(event) + '\n')
+        self._log.flush()
+        self._pending += 1
+        self._events_since_snapshot += 1
+        options = self.options
+        if (self._pending >= options.commit_every
+                or time.monotonic() - self._last_commit
+                >= options.commit_interval):
+            self._commit()
+        if self._events_since_snapshot >= options.snapshot_every:
+            self._snapshot()
+        if self._pending and self._timer is None:
+            # Sin él, el último lote esperaría al siguiente evento
+            self._timer = threading.Timer(options.commit_interval,
+                                          self._commit_due)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _commit_due(self):
+        """Commit the pending events once the commit interval has passed."""
+        with self._lock:
+            self._timer = None
+            if not self._log.closed:
+                self._commit()
+
+    def _commit(self):
+        """Force the pending log entries to disk."""
+        if self._pending:
+            os.fsync(self._log.fileno())
+            self._pending = 0
+        self._last_commit = time.monotonic()
+
+    def _snapshot(self):
+        """Write a snapshot of the hotel and start an empty log."""
+        self._commit()
+        _write_snapshot(self.hotel, self.path, self.sequence)
+        self._log.close()
+        # pylint: disable-next=consider-using-with
+        self._log = open(self.log_path(self.path), 'w', encoding='utf-8')
+        self._events_since_snapshot = 0
+
+    def commit(self):
+        """Force every recorded event to disk."""
+        with self._lock:
+            self._commit()
+
+    def snapshot(self):
+        """Compact the log into a new snapshot."""
+        with self._lock:
+            self._snapshot()
+
+    def close(self):
+        """Commit pending events and close the log."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._commit()
+            self._log.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _apply(hotel, event):
+    """Apply one logged event to a hotel."""
+    operation = event['op']
+    if operation == 'add_room':
+        room = Room(event['number'], event['price'])
+        room.is_occupied = event['is_occupied']
+        hotel.add_room(room)
+    elif operation == 'reserve':
+        hotel.reserve_room(event['number'])
+    elif operation == 'cancel':
+        hotel.cancel_reservation(event['number'])
+    elif operation == 'book':
+        booked = Reservation.from_dict(event['reservation'])
+        hotel.book_room(booked.room_number, booked.customer, booked.check_in,
+                        booked.check_out)
+    elif operation == 'cancel_booking':
+        cancelled = Reservation.from_dict(event['reservation'])
+        # Las reservas de una habitación no se solapan: basta la entrada
+        for reservation in hotel.reservations_for(cancelled.room_number):
+            if reservation.check_in == cancelled.check_in:
+                hotel.cancel_booking(reservation)
+                break
+        else:
+            raise ValueError("Cancelación de una reserva desconocida.")
+    else:
+        raise ValueError(f"Evento desconocido en el diario: {operation}")
+
+
+def _write_snapshot(hotel, path, sequence):
+    """Atomically write a snapshot that includes events up to ``sequence``."""
+    target = HotelJournal.snapshot_path(path)
+    temporary = f"{target}.tmp"
+    with open(temporary, 'w', encoding='utf-8') as file:
+        file.writelines(iter_hotel_json(hotel, sequence=sequence))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, target)
@@ -1,36 +1,164 @@
 """Module for managing hotel operations such
 as room booking and customer management."""
 
+import bisect
+import contextlib
+import heapq
 import json
+import os
+import sys
+import threading
+import types
+from datetime import date
+
+try:
+    import instrumentation
+except ImportError:
+    # Run from this folder: the shared module is in the repository root.
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(
+        __file__))))
+    try:
+        import instrumentation
+    except ImportError:
+        # Stand-in that does nothing when the shared module is missing.
+        instrumentation = types.SimpleNamespace(
+            instrumented=lambda name: lambda function: function,
+            count=lambda name, value=1: None,
+            span=lambda name: contextlib.nullcontext(),
+        )
+
+class _FreeRoomIndex:
+    """Heap of the free rooms of a hotel by price, with lazy deletion.
+
+    Entries are (price key, sequence, room number); the sequence avoids
+    comparing room numbers. An entry whose room was taken since is dropped
+    when it reaches the top.
+    """
+
+    def __init__(self):
+        """Create an empty index."""
+        self.heap = []
+        self.count = 0
+        self._next_sequence = 0
+        # Protege solo el índice de habitaciones libres, no las reservas
+        self.lock = threading.Lock()
+
+    def __getstate__(self):
+        """Return the state to pickle or copy, without the lock."""
+        state = self.__dict__.copy()
+        del state['lock']
+        return state
+
+    def __setstate__(self, state):
+        """Restore a pickled or copied index with a new lock."""
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def _entry(self, room):
+        """Return the heap entry of a free room."""
+        price = room.price
+        # Los precios no numéricos van al final en lugar de fallar al comparar
+        key = (0, price) if isinstance(price, (int, float)) else (1, 0)
+        self._next_sequence += 1
+        return key, self._next_sequence, room.number
+
+    def add(self, room, rooms_by_number):
+        """Add a room that became free."""
+        with self.lock:
+            if len(self.heap) > 2 * self.count + 64:
+                # Demasiadas entradas obsoletas: reconstruir el montículo
+                self.heap = [
+                    self._entry(free)
+                    for free in list(rooms_by_number.values())
+                    if not free.is_occupied and free is not room
+                ]
+                heapq.heapify(self.heap)
+                self.count = len(self.heap)
+            heapq.heappush(self.heap, self._entry(room))
+            self.count += 1
+
+    def taken(self):
+        """Count a room that stopped being free."""
+        with self.lock:
+            self.count -= 1
+
+    def cheapest(self, rooms_by_number):
+        """Return the cheapest free room, dropping stale entries."""
+        with self.lock:
+            heap = self.heap
+            while heap:
+                room = rooms_by_number[heap[0][2]]
+                if not room.is_occupied:
+                    return room
+                heapq.heappop(heap)  # Entrada obsoleta
+            return None
 
 
 class Hotel:
-    """Represents a hotel which can manage rooms and reservations."""
+    """Represents a hotel which can manage rooms and reservations.
+
+    A room has two kinds of bookings. ``reserve_room`` marks it occupied
+    now, with no end date, until ``cancel_reservation``. ``book_room``
+    books it for a range of nights in the room's calendar. An occupied
+    room has no known check-out, so it is neither offered by
+    ``available_rooms`` nor bookable until it is released.
+
+    The free rooms are indexed by price. A room added to the hotel tells it
+    whenever its is_occupied changes, so the index and the free-room count
+    stay right however the occupancy is set.
+    """
 
     def __init__(self, name, address):
         """Initialize a new Hotel instance with a name and an address."""
         self.name = name
         self.address = address
         self.rooms = []  # Lista de objetos Room
+        self._rooms_by_number = {}
+        self._free_rooms = _FreeRoomIndex()
+        self._calendars = {}  # Número de habitación -> RoomCalendar
 
     def add_room(self, room):
         """Add a room to the hotel's list of rooms."""
         self.rooms.append(room)
+        if room.number in self._rooms_by_number:
+            return  # Como la búsqueda lineal, solo cuenta la primera
+        self._rooms_by_number[room.number] = room
+        room._hotel = self  # pylint: disable=protected-access
+        if not room.is_occupied:
+            self._free_rooms.add(room, self._rooms_by_number)
+
+    def _occupancy_changed(self, room):
+        """Update the free-room index after a room was taken or released."""
+        if room.is_occupied:
+            self._free_rooms.taken()
+        else:
+            self._free_rooms.add(room, self._rooms_by_number)
+
+    def get_room(self, room_number):
+        """Return the room with the given number, or None."""
+        return self._rooms_by_number.get(room_number)
+
+    def find_cheapest_free_room(self):
+        """Return the cheapest room that is not occupied, or None."""
+        return self._free_rooms.cheapest(self._rooms_by_number)
+
+    def count_free_rooms(self):
+        """Return the number of rooms that are not occupied."""
+        return self._free_rooms.count
 
     def to_dict(self):
         """Convert the hotel to a dictionary format."""
         return {
             'name': self.name,
             'address': self.address,
-            'rooms': [room.to_dict() for room in self.rooms]
+            'rooms': [room.to_dict() for room in self.rooms],
+            'reservations': [reservation.to_dict()
+                             for reservation in self.all_reservations()]
         }
 
     def reserve_room(self, room_number):
         """Reserve a room by its number."""
-        room = next(
-            (room for room in self.rooms if room.number == room_number),
-            None
-        )
+        room = self._rooms_by_number.get(room_number)
         if room is None:
             raise ValueError("La habitación no existe.")
         if room.is_occupied:
@@ -40,10 +168,7 @@ class Hotel:
 
     def cancel_reservation(self, room_number):
         """Cancel the reservation of a room by its number."""
-        room = next(
-            (room for room in self.rooms if room.number == room_number),
-            None
-        )
+        room = self._rooms_by_number.get(room_number)
         if room is None or not room.is_occupied:
             raise ValueError(
                 "No hay una reservación activa para esta habitación."
@@ -54,16 +179,161 @@ class Hotel:
             "cancelada con éxito."
         )
 
+    def book_room(self, room_number, customer, check_in, check_out):
+        """Book a room for a customer for the nights [check_in, check_out)."""
+        room = self._rooms_by_number.get(room_number)
+        if room is None:
+            raise ValueError("La habitación no existe.")
+        if room.is_occupied:
+            raise ValueError("La habitación está ocupada sin fecha de salida.")
+        reservation = Reservation(room_number, customer, check_in, check_out)
+        self._add_booking(reservation)
+        return reservation
+
+    def _add_booking(self, reservation):
+        """Add a reservation to its room's calendar if the nights are free."""
+        calendar = self._calendars.setdefault(reservation.room_number,
+                                              RoomCalendar())
+        if not calendar.is_free(reservation.check_in, reservation.check_out):
+            raise ValueError("La habitación ya está reservada en esas fechas.")
+        calendar.add(reservation)
+
+    def cancel_booking(self, reservation):
+        """Cancel a reservation made with book_room."""
+        calendar = self._calendars.get(reservation.room_number)
+        if calendar is None or not calendar.remove(reservation):
+            raise ValueError(
+                "No hay una reservación activa para esta habitación."
+            )
+
+    def reservations_for(self, room_number):
+        """Return the reservations of a room ordered by check-in date."""
+        calendar = self._calendars.get(room_number)
+        return list(calendar.reservations) if calendar else []
+
+    def all_reservations(self):
+        """Return every reservation made with book_room, room by room."""
+        return [reservation for calendar in self._calendars.values()
+                for reservation in calendar.reservations]
+
+    def available_rooms(self, check_in, check_out):
+        """Return the free rooms with no reservation in [check_in, check_out).
+
+        Occupied rooms are left out whatever the dates (see the class notes).
+        """
+        _check_dates(check_in, check_out)
+        calendars = self._calendars
+        return [
+            room for number, room in self._rooms_by_number.items()
+            if not room.is_occupied and (
+                number not in calendars
+                or calendars[number].is_free(check_in, check_out))
+        ]
+
+
+def _check_dates(check_in, check_out):
+    """Reject empty or reversed date ranges."""
+    if check_out <= check_in:
+        raise ValueError(
+            "La fecha de salida debe ser posterior a la de entrada."
+        )
+
+
+class Reservation:
+    # pylint: disable=too-few-public-methods
+    """Represents a booking of a room by a customer for a date range."""
+
+    __slots__ = ('room_number', 'customer', 'check_in', 'check_out')
+
+    def __init__(self, room_number, customer, check_in, check_out):
+        """Initialize a reservation for the nights in [check_in, check_out)."""
+        _check_dates(check_in, check_out)
+        self.room_number = room_number
+        self.customer = customer
+        self.check_in = check_in
+        self.check_out = check_out
+
+    def to_dict(self):
+        """Convert the reservation to a dictionary format."""
+        return {
+            'room_number': self.room_number,
+            'customer': self.customer.to_dict(),
+            'check_in': self.check_in.isoformat(),
+            'check_out': self.check_out.isoformat()
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a reservation from the dictionary format of to_dict."""
+        return cls(data['room_number'], Customer(**data['customer']),
+                   date.fromisoformat(data['check_in']),
+                   date.fromisoformat(data['check_out']))
+
+
+class RoomCalendar:
+    """Sorted interval index of the reservations of one room.
+
+    Reservations of a room never overlap, so when sorted by check-in their
+    check-outs are sorted too and an overlap check is a single bisection.
+    """
+
+    __slots__ = ('check_ins', 'check_outs', 'reservations')
+
+    def __init__(self):
+        """Initialize an empty calendar."""
+        self.check_ins = []
+        self.check_outs = []
+        self.reservations = []
+
+    def is_free(self, check_in, check_out):
+        """Return whether no reservation overlaps [check_in, check_out)."""
+        index = bisect.bisect_left(self.check_ins, check_out)
+        return index == 0 or self.check_outs[index - 1] <= check_in
+
+    def add(self, reservation):
+        """Insert a reservation that does not overlap the others."""
+        index = bisect.bisect_left(self.check_ins, reservation.check_in)
+        self.check_ins.insert(index, reservation.check_in)
+        self.check_outs.insert(index, reservation.check_out)
+        self.reservations.insert(index, reservation)
+
+    def remove(self, reservation):
+        """Remove a reservation; return False if it is not in the calendar."""
+        index = bisect.bisect_left(self.check_ins, reservation.check_in)
+        if (index == len(self.reservations)
+                or self.reservations[index] is not reservation):
+            return False
+        del self.check_ins[index]
+        del self.check_outs[index]
+        del self.reservations[index]
+        return True
+
 
 class Room:
     # pylint: disable=too-few-public-methods
     """Represents a room in the hotel."""
 
+    __slots__ = ('number', 'price', '_occupied', '_hotel')
+
     def __init__(self, number, price):
         """Initialize a room with a number, price, and occupancy status."""
         self.number = number
         self.price = price
-        self.is_occupied = False
+        self._occupied = False
+        self._hotel = None  # Hotel cuyo índice de libres hay que avisar
+
+    @property
+    def is_occupied(self):
+        """Whether the room is taken; setting it updates the hotel's index."""
+        return self._occupied
+
+    @is_occupied.setter
+    def is_occupied(self, occupied):
+        was_occupied = self._occupied
+        self._occupied = occupied
+        if self._hotel is not None and bool(occupied) != bool(was_occupied):
+            # pylint: disable-next=protected-access
+            self._hotel._occupancy_changed(self)
 
     def to_dict(self):
         """Convert the room to a dictionary format."""
@@ -78,6 +348,8 @@ class Customer:
     # pylint: disable=too-few-public-methods
     """Represents a customer of the hotel."""
 
+    __slots__ = ('name', 'email')
+
     def __init__(self, name, email):
         """Initialize a customer with a name and an email."""
         self.name = name
@@ -91,19 +363,77 @@ class Customer:
         }
 
 
+def _json_scalar(value):
+    """Encode a room attribute as JSON, with fast paths for common types."""
+    if value is True:
+        return 'true'
+    if value is False:
+        return 'false'
+    value_type = type(value)
+    if value_type is int:
+        return int.__repr__(value)
+    if value_type is float and value - value == 0:  # Finito
+        return float.__repr__(value)
+    return json.dumps(value)
+
+
+def iter_hotel_json(hotel, **extra):
+    """Yield the JSON text of a hotel, as json.dump(..., indent=4) would.
+
+    The rooms are written straight from their attributes, without building
+    a dictionary per room. ``extra`` adds top-level keys after
+    ``reservations``.
+    """
+    encode = json.dumps
+    yield (f'{{\n    "name": {encode(hotel.name)},\n'
+           f'    "address": {encode(hotel.address)},\n    "rooms": [')
+    room_template = ('\n        {\n            "number": %s,\n'
+                     '            "price": %s,\n'
+                     '            "is_occupied": %s\n        },')
+    scalar = _json_scalar
+    text = ''.join([
+        room_template % (scalar(room.number), scalar(room.price),
+                         scalar(room.is_occupied))
+        for room in hotel.rooms
+    ])
+    yield text[:-1] + '\n    ]' if text else ']'
+    reservations = [reservation.to_dict()
+                    for reservation in hotel.all_reservations()]
+    yield (',\n    "reservations": '
+           + encode(reservations, indent=4).replace('\n', '\n    '))
+    for key, value in extra.items():
+        yield f',\n    {encode(key)}: {encode(value)}'
+    yield '\n}'
+
+
+@instrumentation.instrumented('hotel_management.save_hotel')
 def save_hotel(hotel, filename='hotel_data.json'):
     """Save hotel data to a JSON file."""
+    instrumentation.count('rooms_saved', len(hotel.rooms))
     with open(filename, 'w', encoding='utf-8') as file:
-        json.dump(hotel.to_dict(), file, indent=4)
+        file.writelines(iter_hotel_json(hotel))
 
 
-def load_hotel(filename='hotel_data.json'):
-    """Load hotel data from a JSON file."""
-    with open(filename, 'r', encoding='utf-8') as file:
-        data = json.load(file)
+def hotel_from_dict(data):
+    """Build a hotel from the dictionary format of Hotel.to_dict."""
     hotel = Hotel(data['name'], data['address'])
     for room_data in data['rooms']:
         room = Room(room_data['number'], room_data['price'])
         room.is_occupied = room_data.get('is_occupied', False)
         hotel.add_room(room)
+    for reservation_data in data.get('reservations', ()):
+        # Sin book_room: la habitación pudo ocuparse después de reservarla
+        # pylint: disable-next=protected-access
+        hotel._add_booking(Reservation.from_dict(reservation_data))
+    return hotel
+
+
+@instrumentation.instrumented('hotel_management.load_hotel')
+def load_hotel(filename='hotel_data.json'):
+    """Load hotel data from a JSON file."""
+    with instrumentation.span('hotel_management.load_hotel.parse'):
+        with open(filename, 'r', encoding='utf-8') as file:
+            data = json.load(file)
+    hotel = hotel_from_dict(data)
+    instrumentation.count('rooms_loaded', len(hotel.rooms))
     return hotel
@@ -0,0 +1,89 @@
+"""Unit tests for booking_engine module."""
+import asyncio
+import threading
+import unittest
+from booking_engine import BookingEngine
+from hotel_management import Hotel, Room
+
+
+class TestBookingEngine(unittest.TestCase):
+    """Tests for the concurrency-safe booking engine."""
+    def setUp(self):
+        """Create an engine over a hotel with a few rooms."""
+        self.hotel = Hotel("Test Hotel", "123 Test Address")
+        for number in range(101, 111):
+            self.hotel.add_room(Room(number, number))
+        self.engine = BookingEngine(self.hotel, stripes=4)
+
+    def test_reserve_and_cancel(self):
+        """Single bookings behave like the hotel methods."""
+        self.engine.reserve_room(101)
+        self.assertTrue(self.hotel.get_room(101).is_occupied)
+        with self.assertRaises(ValueError):
+            self.engine.reserve_room(101)
+        self.engine.cancel_reservation(101)
+        self.assertFalse(self.hotel.get_room(101).is_occupied)
+        with self.assertRaises(ValueError):
+            self.engine.cancel_reservation(101)
+
+    def test_concurrent_reservations_book_each_room_once(self):
+        """Threads racing for the same rooms never double-book them."""
+        successes = []
+        barrier = threading.Barrier(8)
+
+        def worker():
+            barrier.wait()
+            for number in range(101, 111):
+                try:
+                    self.engine.reserve_room(number)
+                except ValueError:
+                    continue
+                successes.append(number)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(successes), list(range(101, 111)))
+        self.assertEqual(self.hotel.count_free_rooms(), 0)
+
+    def test_batch_reservation(self):
+        """A batch reserves all of its rooms."""
+        self.engine.reserve_rooms([101, 105, 109])
+        for number in (101, 105, 109):
+            self.assertTrue(self.hotel.get_room(number).is_occupied)
+        self.assertEqual(self.hotel.count_free_rooms(), 7)
+
+    def test_batch_reservation_is_all_or_nothing(self):
+        """A failing batch leaves every room untouched."""
+        self.engine.reserve_room(105)
+        with self.assertRaises(ValueError):
+            self.engine.reserve_rooms([101, 105, 109])
+        with self.assertRaises(ValueError):
+            self.engine.reserve_rooms([101, 999])
+        with self.assertRaises(ValueError):
+            self.engine.reserve_rooms([101, 101])
+        self.assertFalse(self.hotel.get_room(101).is_occupied)
+        self.assertFalse(self.hotel.get_room(109).is_occupied)
+        self.assertEqual(self.hotel.count_free_rooms(), 9)
+
+    def test_async_api(self):
+        """The asyncio API books each room once across coroutines."""
+        async def book_all():
+            return await asyncio.gather(
+                *(self.engine.reserve_room_async(102) for _ in range(5)),
+                return_exceptions=True
+            )
+
+        outcomes = asyncio.run(book_all())
+        errors = [item for item in outcomes if isinstance(item, ValueError)]
+        self.assertEqual(len(errors), 4)
+        asyncio.run(self.engine.reserve_rooms_async([103, 104]))
+        asyncio.run(self.engine.cancel_reservation_async(103))
+        self.assertFalse(self.hotel.get_room(103).is_occupied)
+        self.assertTrue(self.hotel.get_room(104).is_occupied)
+
+
+if __name__ == '__main__':
+    unittest.main()
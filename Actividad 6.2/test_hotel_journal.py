@@ -0,0 +1,119 @@
+"""Unit tests for hotel_journal module."""
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from datetime import date
+from hotel_journal import HotelJournal
+from hotel_management import Customer, Hotel, Room
+
+
+class TestHotelJournal(unittest.TestCase):
+    """Tests for write-ahead-log persistence and recovery."""
+    def setUp(self):
+        """Create a journal for a hotel in a temporary directory."""
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'hotel')
+        hotel = Hotel("Test Hotel", "123 Test Address")
+        hotel.add_room(Room(101, 100))
+        self.journal = HotelJournal.create(hotel, self.path)
+
+    def tearDown(self):
+        """Remove the journal files."""
+        self.journal.close()
+        shutil.rmtree(self.directory)
+
+    def test_recover_replays_log(self):
+        """Recovery applies the events written after the snapshot."""
+        self.journal.add_room(Room(102, 150))
+        self.journal.reserve_room(101)
+        self.journal.reserve_room(102)
+        self.journal.cancel_reservation(102)
+        self.journal.close()
+
+        recovered = HotelJournal.recover(self.path)
+        hotel = recovered.hotel
+        recovered.close()
+        self.assertEqual(hotel.name, "Test Hotel")
+        self.assertEqual(len(hotel.rooms), 2)
+        self.assertTrue(hotel.get_room(101).is_occupied)
+        self.assertFalse(hotel.get_room(102).is_occupied)
+        self.assertEqual(hotel.count_free_rooms(), 1)
+
+    def test_failed_operation_is_not_logged(self):
+        """Operations rejected by the hotel leave the log unchanged."""
+        with self.assertRaises(ValueError):
+            self.journal.reserve_room(999)
+        with self.assertRaises(ValueError):
+            self.journal.cancel_reservation(101)
+        self.assertEqual(self.journal.sequence, 0)
+
+    def test_snapshot_compacts_log(self):
+        """Snapshots empty the log and recovery still sees every event."""
+        self.journal.close()
+        self.journal = HotelJournal.recover(self.path, snapshot_every=3)
+        for _ in range(2):
+            self.journal.reserve_room(101)
+            self.journal.cancel_reservation(101)
+        self.journal.reserve_room(101)
+        self.journal.close()
+        with open(HotelJournal.log_path(self.path), encoding='utf-8') as file:
+            self.assertEqual(len(file.readlines()), 2)
+
+        recovered = HotelJournal.recover(self.path)
+        recovered.close()
+        self.assertTrue(recovered.hotel.get_room(101).is_occupied)
+        self.assertEqual(recovered.sequence, 5)
+
+    def test_recover_ignores_torn_last_line(self):
+        """An incomplete last entry from a crash is discarded."""
+        self.journal.reserve_room(101)
+        self.journal.close()
+        with open(HotelJournal.log_path(self.path), 'a',
+                  encoding='utf-8') as file:
+            file.write('{"op": "cancel", "num')
+
+        recovered = HotelJournal.recover(self.path)
+        recovered.cancel_reservation(101)
+        recovered.close()
+        recovered = HotelJournal.recover(self.path)
+        recovered.close()
+        hotel = recovered.hotel
+        self.assertFalse(hotel.get_room(101).is_occupied)
+
+    def test_recover_bookings(self):
+        """Bookings survive recovery from the log and from a snapshot."""
+        customer = Customer("John Doe", "john.doe@example.com")
+        kept = self.journal.book_room(101, customer, date(2024, 3, 1),
+                                      date(2024, 3, 4))
+        cancelled = self.journal.book_room(101, customer, date(2024, 3, 5),
+                                           date(2024, 3, 6))
+        self.journal.cancel_booking(cancelled)
+        self.journal.close()
+        for take_snapshot in (False, True):
+            with self.subTest(take_snapshot=take_snapshot):
+                recovered = HotelJournal.recover(self.path)
+                if take_snapshot:
+                    recovered.snapshot()
+                recovered.close()
+                bookings = recovered.hotel.reservations_for(101)
+                self.assertEqual([booking.to_dict() for booking in bookings],
+                                 [kept.to_dict()])
+
+    def test_last_batch_committed_without_further_events(self):
+        """Pending events are committed once the interval passes."""
+        # pylint: disable=protected-access
+        self.journal.close()
+        journal = HotelJournal.recover(self.path, commit_every=1000,
+                                       commit_interval=0.01)
+        journal.reserve_room(101)
+        deadline = time.monotonic() + 5
+        while journal._pending and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(journal._pending, 0)
+        journal.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,13 @@
 """Unit tests for hotel_management module."""
+import copy
+import json
+import os
+import pickle
+import tempfile
 import unittest
+from datetime import date, timedelta
 from hotel_management import Hotel, Room, Customer, save_hotel, load_hotel
+from hotel_management import iter_hotel_json
 
 
 class TestCustomer(unittest.TestCase):
@@ -115,5 +122,213 @@ class TestHotelManagement(unittest.TestCase):
             _ = load_hotel('nonexistent_file.json')
 
 
+class TestHotelRoomIndex(unittest.TestCase):
+    """Tests for the room number index and the free-room index."""
+    def setUp(self):
+        """Create a hotel with rooms at different prices."""
+        self.hotel = Hotel("Test Hotel", "123 Test Address")
+        for number, price in ((101, 300), (102, 100), (103, 200)):
+            self.hotel.add_room(Room(number, price))
+
+    def test_get_room(self):
+        """Rooms are found by number; unknown numbers give None."""
+        self.assertEqual(self.hotel.get_room(102).price, 100)
+        self.assertIsNone(self.hotel.get_room(999))
+
+    def test_cheapest_free_room_follows_reservations(self):
+        """The cheapest free room changes as rooms are booked and freed."""
+        self.assertEqual(self.hotel.find_cheapest_free_room().number, 102)
+        self.hotel.reserve_room(102)
+        self.assertEqual(self.hotel.find_cheapest_free_room().number, 103)
+        self.hotel.reserve_room(103)
+        self.hotel.reserve_room(101)
+        self.assertIsNone(self.hotel.find_cheapest_free_room())
+        self.hotel.cancel_reservation(103)
+        self.assertEqual(self.hotel.find_cheapest_free_room().number, 103)
+
+    def test_count_free_rooms(self):
+        """The free-room count is kept in sync with bookings."""
+        self.assertEqual(self.hotel.count_free_rooms(), 3)
+        self.hotel.reserve_room(101)
+        self.assertEqual(self.hotel.count_free_rooms(), 2)
+        with self.assertRaises(ValueError):
+            self.hotel.reserve_room(101)
+        self.assertEqual(self.hotel.count_free_rooms(), 2)
+        self.hotel.cancel_reservation(101)
+        self.assertEqual(self.hotel.count_free_rooms(), 3)
+
+    def test_many_booking_cycles(self):
+        """Repeated booking cycles keep the indexes consistent."""
+        for _ in range(500):
+            self.hotel.reserve_room(102)
+            self.hotel.cancel_reservation(102)
+        self.assertEqual(self.hotel.count_free_rooms(), 3)
+        self.assertEqual(self.hotel.find_cheapest_free_room().number, 102)
+
+    def test_loaded_occupied_room_is_not_free(self):
+        """Occupied rooms added to a hotel are not counted as free."""
+        room = Room(104, 50)
+        room.is_occupied = True
+        self.hotel.add_room(room)
+        self.assertEqual(self.hotel.count_free_rooms(), 3)
+        self.assertEqual(self.hotel.find_cheapest_free_room().number, 102)
+
+    def test_unorderable_prices_and_numbers(self):
+        """Rooms without a numeric price or with mixed number types index."""
+        self.hotel.add_room(Room("104", 100))
+        self.hotel.add_room(Room(105, None))
+        self.assertEqual(self.hotel.count_free_rooms(), 5)
+        for number in (102, "104", 103, 101):
+            self.assertEqual(self.hotel.find_cheapest_free_room().number,
+                             number)
+            self.hotel.reserve_room(number)
+        self.assertEqual(self.hotel.find_cheapest_free_room().number, 105)
+
+    def test_occupancy_set_directly(self):
+        """Setting is_occupied on a room keeps the hotel's indexes right."""
+        for number in (101, 102, 103):
+            self.hotel.get_room(number).is_occupied = True
+        self.assertEqual(self.hotel.count_free_rooms(), 0)
+        self.assertIsNone(self.hotel.find_cheapest_free_room())
+        self.hotel.get_room(103).is_occupied = False
+        self.assertEqual(self.hotel.count_free_rooms(), 1)
+        self.assertEqual(self.hotel.find_cheapest_free_room().number, 103)
+
+    def test_cancel_after_direct_occupancy(self):
+        """Cancelling a room taken directly does not count it twice."""
+        hotel = Hotel("Small Hotel", "Address")
+        hotel.add_room(Room(1, 100))
+        hotel.get_room(1).is_occupied = True
+        hotel.cancel_reservation(1)
+        self.assertEqual(hotel.count_free_rooms(), 1)
+        hotel.get_room(1).is_occupied = True
+        self.assertEqual(hotel.count_free_rooms(), 0)
+
+    def test_pickle_and_deepcopy(self):
+        """Copies keep their rooms and indexes and have their own lock."""
+        self.hotel.reserve_room(101)
+        for clone in (pickle.loads(pickle.dumps(self.hotel)),
+                      copy.deepcopy(self.hotel)):
+            self.assertEqual(clone.count_free_rooms(), 2)
+            clone.get_room(102).is_occupied = True
+            self.assertEqual(clone.count_free_rooms(), 1)
+            self.assertEqual(clone.find_cheapest_free_room().number, 103)
+            clone.cancel_reservation(101)
+            self.assertEqual(clone.count_free_rooms(), 2)
+        self.assertEqual(self.hotel.count_free_rooms(), 2)
+
+
+class TestReservationCalendar(unittest.TestCase):
+    """Tests for date-range reservations and availability queries."""
+    def setUp(self):
+        """Create a hotel with two rooms and a customer."""
+        self.hotel = Hotel("Test Hotel", "123 Test Address")
+        self.hotel.add_room(Room(101, 100))
+        self.hotel.add_room(Room(102, 150))
+        self.customer = Customer("John Doe", "john.doe@example.com")
+
+    def test_book_room(self):
+        """A booking is linked to its customer and dates."""
+        reservation = self.hotel.book_room(
+            101, self.customer, date(2024, 3, 1), date(2024, 3, 4)
+        )
+        self.assertIs(reservation.customer, self.customer)
+        self.assertEqual(self.hotel.reservations_for(101), [reservation])
+        self.assertEqual(reservation.to_dict()['check_out'], '2024-03-04')
+
+    def test_overlapping_booking_is_rejected(self):
+        """Overlapping stays fail while back-to-back stays succeed."""
+        self.hotel.book_room(101, self.customer, date(2024, 3, 5),
+                             date(2024, 3, 10))
+        for check_in, check_out in ((date(2024, 3, 1), date(2024, 3, 6)),
+                                    (date(2024, 3, 9), date(2024, 3, 12)),
+                                    (date(2024, 3, 6), date(2024, 3, 7)),
+                                    (date(2024, 3, 1), date(2024, 3, 20))):
+            with self.assertRaises(ValueError):
+                self.hotel.book_room(101, self.customer, check_in, check_out)
+        self.hotel.book_room(101, self.customer, date(2024, 3, 1),
+                             date(2024, 3, 5))
+        self.hotel.book_room(101, self.customer, date(2024, 3, 10),
+                             date(2024, 3, 12))
+        self.assertEqual(len(self.hotel.reservations_for(101)), 3)
+
+    def test_invalid_bookings(self):
+        """Unknown rooms and empty date ranges are rejected."""
+        with self.assertRaises(ValueError):
+            self.hotel.book_room(999, self.customer, date(2024, 3, 1),
+                                 date(2024, 3, 2))
+        with self.assertRaises(ValueError):
+            self.hotel.book_room(101, self.customer, date(2024, 3, 2),
+                                 date(2024, 3, 2))
+
+    def test_available_rooms(self):
+        """Availability reflects bookings and cancellations."""
+        reservation = self.hotel.book_room(
+            101, self.customer, date(2024, 3, 1), date(2024, 3, 4)
+        )
+        free = self.hotel.available_rooms(date(2024, 3, 3), date(2024, 3, 5))
+        self.assertEqual([room.number for room in free], [102])
+        free = self.hotel.available_rooms(date(2024, 3, 4), date(2024, 3, 5))
+        self.assertEqual([room.number for room in free], [101, 102])
+        self.hotel.cancel_booking(reservation)
+        free = self.hotel.available_rooms(date(2024, 3, 3), date(2024, 3, 5))
+        self.assertEqual([room.number for room in free], [101, 102])
+        with self.assertRaises(ValueError):
+            self.hotel.cancel_booking(reservation)
+
+    def test_occupied_rooms_are_not_available(self):
+        """A room reserved with no end date cannot be booked for any dates."""
+        self.hotel.reserve_room(101)
+        free = self.hotel.available_rooms(date(2024, 3, 1), date(2024, 3, 2))
+        self.assertEqual([room.number for room in free], [102])
+        with self.assertRaises(ValueError):
+            self.hotel.book_room(101, self.customer, date(2024, 3, 1),
+                                 date(2024, 3, 2))
+        self.hotel.cancel_reservation(101)
+        self.hotel.book_room(101, self.customer, date(2024, 3, 1),
+                             date(2024, 3, 2))
+
+    def test_save_and_load_bookings(self):
+        """Bookings are saved with the hotel and loaded back."""
+        self.hotel.book_room(101, self.customer, date(2024, 3, 1),
+                             date(2024, 3, 4))
+        self.hotel.book_room(102, self.customer, date(2024, 3, 2),
+                             date(2024, 3, 3))
+        self.hotel.reserve_room(102)
+        self.assertEqual(''.join(iter_hotel_json(self.hotel)),
+                         json.dumps(self.hotel.to_dict(), indent=4))
+        fd, path = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+        try:
+            save_hotel(self.hotel, path)
+            loaded = load_hotel(path)
+        finally:
+            os.remove(path)
+        self.assertEqual(loaded.to_dict(), self.hotel.to_dict())
+        self.assertEqual(loaded.reservations_for(101)[0].customer.email,
+                         "john.doe@example.com")
+        with self.assertRaises(ValueError):
+            loaded.book_room(101, self.customer, date(2024, 3, 3),
+                             date(2024, 3, 5))
+
+    def test_many_bookings_match_linear_scan(self):
+        """The interval index agrees with a brute-force overlap check."""
+        start = date(2024, 1, 1)
+        stays = [(day, 1 + day % 4) for day in range(0, 300, 5)]
+        for offset, nights in stays:
+            self.hotel.book_room(101, self.customer,
+                                 start + timedelta(days=offset),
+                                 start + timedelta(days=offset + nights))
+        for offset in range(0, 300):
+            check_in = start + timedelta(days=offset)
+            check_out = check_in + timedelta(days=2)
+            expected = not any(
+                stay_in < offset + 2 and offset < stay_in + nights
+                for stay_in, nights in stays
+            )
+            free = self.hotel.available_rooms(check_in, check_out)
+            self.assertEqual(101 in [room.number for room in free], expected)
+
+
 if __name__ == '__main__':
     unittest.main()
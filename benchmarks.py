@@ -0,0 +1,478 @@
+"""
+Benchmark suite for the tools of this repository.
+
+Deterministic generators build synthetic inputs for every tool: TC number
+files, Zipfian word corpora, catalog and sales JSON, and hotel booking
+traces. The hot path of each tool is run at several data sizes. Throughput
+and peak memory are reported, the results are stored as JSON, and they
+can be compared against a stored baseline to flag regressions.
+
+Usage:
+    python benchmarks.py [--sizes small medium] [--output results.json]
+                         [--baseline baseline.json] [--update-baseline]
+"""
+
+import argparse
+import contextlib
+import datetime
+import itertools
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+for folder in ('Actividad 5.2', 'Actividad 6.2'):
+    sys.path.insert(0, os.path.join(HERE, folder))
+
+# pylint: disable=wrong-import-position
+import compute_sales
+import compute_statistics
+import convert_numbers
+import hotel_management
+import word_count
+
+SIZES = {'small': 10_000, 'medium': 100_000, 'large': 1_000_000}
+DEFAULT_SIZES = ('small', 'medium')
+DEFAULT_TOLERANCE = 0.2
+FIRST_DATE = datetime.date(2025, 1, 1)
+
+
+def generate_numbers(path, lines, invalid_ratio=0.01, seed=0):
+    """
+    Write a TC-style file with one number per line.
+
+    :param path: string, the file to write
+    :param lines: int, the number of lines
+    :param invalid_ratio: float, the fraction of lines that are not numbers
+    :param seed: int, the seed of the generator
+    """
+    generator = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as file:
+        for _ in range(lines):
+            if generator.random() < invalid_ratio:
+                invalid = generator.choice(('abc', '1.2.3', '', 'N/A'))
+                file.write(invalid + '\n')
+            elif generator.random() < 0.5:
+                file.write(f"{generator.randint(-10**6, 10**6)}\n")
+            else:
+                file.write(f"{generator.uniform(-1e6, 1e6):.3f}\n")
+
+
+def generate_integers(path, lines, invalid_ratio=0.01, seed=0):
+    """Write a TC-style file of integers, as convert_numbers reads them."""
+    generator = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as file:
+        for _ in range(lines):
+            if generator.random() < invalid_ratio:
+                invalid = generator.choice(('abc', '1.5', 'ABBA', '-'))
+                file.write(invalid + '\n')
+            else:
+                file.write(f"{generator.randint(-2**40, 2**40)}\n")
+
+
+def zipf_vocabulary(size, seed=0):
+    """Return ``size`` distinct lowercase words in a deterministic order."""
+    generator = random.Random(seed)
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    vocabulary = {}
+    while len(vocabulary) < size:
+        word = ''.join(generator.choices(letters, k=generator.randint(2, 10)))
+        vocabulary[word] = None
+    return list(vocabulary)
+
+
+def generate_corpus(path, words, vocabulary_size=50_000, exponent=1.1,
+                    invalid_ratio=0.001, seed=0):
+    """
+    Write a text corpus whose word frequencies follow a Zipf law.
+
+    :param path: string, the file to write
+    :param words: int, the number of tokens
+    :param vocabulary_size: int, the number of distinct words
+    :param exponent: float, the Zipf exponent; rank r has weight 1 / r**s
+    :param invalid_ratio: float, the fraction of non-alphabetic tokens
+    :param seed: int, the seed of the generator
+    """
+    generator = random.Random(seed)
+    vocabulary = zipf_vocabulary(vocabulary_size, seed)
+    weights = list(itertools.accumulate(
+        1 / rank ** exponent for rank in range(1, vocabulary_size + 1)
+    ))
+    with open(path, 'w', encoding='utf-8') as file:
+        for start in range(0, words, 12):
+            tokens = generator.choices(vocabulary, cum_weights=weights,
+                                       k=min(12, words - start))
+            if generator.random() < invalid_ratio * 12:
+                tokens[0] = f"{tokens[0]}{generator.randint(0, 9)}"
+            if generator.random() < 0.1:
+                tokens[-1] = tokens[-1].capitalize()
+            file.write(' '.join(tokens) + '\n')
+
+
+def generate_sales(catalog_path, sales_path, sales, products=1000,
+                   missing_ratio=0.0, seed=0):
+    """
+    Write a price catalog and a sales record in the format of Actividad 5.2.
+
+    :param catalog_path: string, the catalog file to write
+    :param sales_path: string, the sales file to write
+    :param sales: int, the number of sales
+    :param products: int, the number of products in the catalog
+    :param missing_ratio: float, the fraction of sales of unknown products
+    :param seed: int, the seed of the generator
+    """
+    generator = random.Random(seed)
+    catalog = [
+        {'title': f"Product {number}", 'type': 'benchmark',
+         'description': f"Synthetic product {number}",
+         'price': round(generator.uniform(0.5, 500), 2)}
+        for number in range(products)
+    ]
+    with open(catalog_path, 'w', encoding='utf-8') as file:
+        json.dump(catalog, file, indent=2)
+    with open(sales_path, 'w', encoding='utf-8') as file:
+        file.write('[')
+        for number in range(sales):
+            if generator.random() < missing_ratio:
+                product = f"Unknown {number}"
+            else:
+                product = f"Product {generator.randrange(products)}"
+            date = FIRST_DATE + datetime.timedelta(days=number % 365)
+            sale = {'SALE_ID': number + 1,
+                    'SALE_Date': date.strftime('%d/%m/%y'),
+                    'Product': product,
+                    'Quantity': generator.randint(1, 20)}
+            file.write((',\n  ' if number else '\n  ') + json.dumps(sale))
+        file.write('\n]\n')
+
+
+def generate_booking_trace(path, events, rooms=500, seed=0):
+    """
+    Write a trace of hotel operations as one JSON event per line.
+
+    Events are ``reserve`` and ``cancel`` of a room, date-range ``book``
+    events and ``available`` queries over a date range.
+
+    :param path: string, the file to write
+    :param events: int, the number of events
+    :param rooms: int, the number of rooms the trace refers to
+    :param seed: int, the seed of the generator
+    """
+    generator = random.Random(seed)
+    operations = ('reserve', 'cancel', 'book', 'book', 'book', 'available')
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write(json.dumps({'op': 'rooms', 'count': rooms}) + '\n')
+        for _ in range(events):
+            operation = generator.choice(operations)
+            event = {'op': operation}
+            if operation != 'available':
+                event['room'] = generator.randrange(rooms)
+            if operation in ('book', 'available'):
+                event['check_in'] = generator.randrange(365)
+                event['nights'] = generator.randint(1, 14)
+            file.write(json.dumps(event) + '\n')
+
+
+def replay_booking_trace(path):
+    """
+    Replay a booking trace against a new hotel.
+
+    :return: int, the number of events replayed
+    """
+    hotel = hotel_management.Hotel("Benchmark Hotel", "Synthetic trace")
+    customer = hotel_management.Customer("Benchmark", "bench@example.com")
+    events = 0
+    with open(path, 'r', encoding='utf-8') as file:
+        for line in file:
+            event = json.loads(line)
+            operation = event['op']
+            try:
+                if operation == 'rooms':
+                    for number in range(event['count']):
+                        hotel.add_room(
+                            hotel_management.Room(number, 100 + number % 50)
+                        )
+                    continue
+                if operation == 'reserve':
+                    hotel.reserve_room(event['room'])
+                elif operation == 'cancel':
+                    hotel.cancel_reservation(event['room'])
+                else:
+                    check_in = (FIRST_DATE
+                                + datetime.timedelta(event['check_in']))
+                    check_out = check_in + datetime.timedelta(event['nights'])
+                    if operation == 'book':
+                        hotel.book_room(event['room'], customer, check_in,
+                                        check_out)
+                    else:
+                        hotel.available_rooms(check_in, check_out)
+            except ValueError:
+                pass
+            events += 1
+    return events
+
+
+class Workload:
+    """A tool's hot path together with the generator of its input."""
+
+    def __init__(self, name, generate, run):
+        """
+        Describe a workload.
+
+        :param name: string, the name used in the results
+        :param generate: callable(directory, size), writes the input and
+                         returns the files it wrote and the number of
+                         items (lines, words, sales or events) in them
+        :param run: callable(files), runs the hot path over the files
+        """
+        self.name = name
+        self.generate = generate
+        self.run = run
+
+
+def _generate_statistics(directory, size):
+    """Write a TC number file of ``size`` lines for compute_statistics."""
+    path = os.path.join(directory, f"TC_statistics_{size}.txt")
+    generate_numbers(path, size)
+    return [path], size
+
+
+def _run_statistics(files):
+    """Compute the statistics of each file with the pure-Python backend."""
+    for path in files:
+        compute_statistics.process_file(path, backend='python')
+
+
+def _generate_convert(directory, size):
+    """Write a file of ``size`` integers for convert_numbers."""
+    path = os.path.join(directory, f"TC_convert_{size}.txt")
+    generate_integers(path, size)
+    return [path], size
+
+
+def _run_convert(files):
+    """Convert every number of each file, discarding the results."""
+    for path in files:
+        for _ in convert_numbers.iter_file_results(path):
+            pass
+
+
+def _generate_words(directory, size):
+    """Write a Zipfian corpus of ``10 * size`` words for word_count."""
+    path = os.path.join(directory, f"corpus_{size}.txt")
+    generate_corpus(path, size * 10)
+    return [path], size * 10
+
+
+def _run_words(files):
+    """Count the words of each file."""
+    for path in files:
+        word_count.count_words(path)
+
+
+def _generate_sales(directory, size):
+    """Write a catalog and a record of ``size`` sales."""
+    catalog_path = os.path.join(directory, f"catalog_{size}.json")
+    sales_path = os.path.join(directory, f"sales_{size}.json")
+    generate_sales(catalog_path, sales_path, size)
+    return [catalog_path, sales_path], size
+
+
+def _run_sales(files):
+    """Load the catalog and the sales and compute the total cost."""
+    catalog_path, sales_path = files
+    catalog_index = compute_sales.build_catalog_index(
+        compute_sales.load_data(catalog_path)
+    )
+    sales = compute_sales.load_data(sales_path)
+    compute_sales.compute_total_cost(None, sales, catalog_index)
+
+
+def _generate_hotel(directory, size):
+    """Write a booking trace of ``size`` events."""
+    path = os.path.join(directory, f"booking_trace_{size}.jsonl")
+    generate_booking_trace(path, size)
+    return [path], size
+
+
+def _run_hotel(files):
+    """Replay each booking trace against a new hotel."""
+    for path in files:
+        replay_booking_trace(path)
+
+
+WORKLOADS = [
+    Workload('compute_statistics', _generate_statistics, _run_statistics),
+    Workload('convert_numbers', _generate_convert, _run_convert),
+    Workload('word_count', _generate_words, _run_words),
+    Workload('compute_sales', _generate_sales, _run_sales),
+    Workload('hotel_management', _generate_hotel, _run_hotel),
+]
+
+
+def measure(workload, files, items, repeat=3):
+    """
+    Time a workload and measure its peak memory.
+
+    The best of ``repeat`` timed runs is kept; peak memory is measured in a
+    separate run under tracemalloc so tracing does not skew the timings.
+    Everything the tool prints is discarded.
+
+    :return: dict, the measurements of the workload
+    """
+    input_bytes = sum(os.path.getsize(path) for path in files)
+    best = float('inf')
+    with open(os.devnull, 'w', encoding='utf-8') as devnull, \
+            contextlib.redirect_stdout(devnull):
+        for _ in range(repeat):
+            start_time = time.perf_counter()
+            workload.run(files)
+            best = min(best, time.perf_counter() - start_time)
+        tracemalloc.start()
+        try:
+            workload.run(files)
+            _, peak_memory = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return {
+        'seconds': best,
+        'items': items,
+        'input_bytes': input_bytes,
+        'items_per_second': items / best,
+        'bytes_per_second': input_bytes / best,
+        'peak_memory_bytes': peak_memory,
+    }
+
+
+def run_suite(sizes=DEFAULT_SIZES, workloads=None, repeat=3, directory=None):
+    """
+    Generate the inputs and measure every workload at every size.
+
+    :param sizes: iterable of names from SIZES
+    :param workloads: iterable of workload names (default: all of them)
+    :param repeat: int, the number of timed runs per measurement
+    :param directory: string, where to write the inputs (default: temp dir)
+    :return: dict, the results keyed by ``workload/size``
+    """
+    selected = [workload for workload in WORKLOADS
+                if workloads is None or workload.name in workloads]
+    results = {}
+    with tempfile.TemporaryDirectory(dir=directory) as data_directory:
+        for size_name in sizes:
+            for workload in selected:
+                files, items = workload.generate(data_directory,
+                                                 SIZES[size_name])
+                results[f"{workload.name}/{size_name}"] = measure(
+                    workload, files, items, repeat
+                )
+                for path in files:
+                    os.remove(path)
+    return results
+
+
+def find_regressions(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compare results with a baseline.
+
+    A result regresses when its throughput drops, or its peak memory grows,
+    by more than ``tolerance`` (a fraction) relative to the baseline.
+    Results missing from the baseline are not compared.
+
+    :return: list of strings describing each regression
+    """
+    regressions = []
+    for key, result in sorted(results.items()):
+        reference = baseline.get(key)
+        if reference is None:
+            continue
+        throughput = result['items_per_second']
+        reference_throughput = reference['items_per_second']
+        if throughput < reference_throughput * (1 - tolerance):
+            regressions.append(
+                f"{key}: throughput {throughput:,.0f} items/s, "
+                f"baseline {reference_throughput:,.0f} items/s"
+            )
+        memory = result['peak_memory_bytes']
+        reference_memory = reference['peak_memory_bytes']
+        if memory > reference_memory * (1 + tolerance):
+            regressions.append(
+                f"{key}: peak memory {memory:,} bytes, "
+                f"baseline {reference_memory:,} bytes"
+            )
+    return regressions
+
+
+def format_results(results):
+    """Return a table of the results, one line per measurement."""
+    lines = [f"{'benchmark':<32}{'items/s':>14}{'MB/s':>10}{'peak MB':>10}"]
+    for key, result in results.items():
+        lines.append(
+            f"{key:<32}{result['items_per_second']:>14,.0f}"
+            f"{result['bytes_per_second'] / 1e6:>10.1f}"
+            f"{result['peak_memory_bytes'] / 1e6:>10.1f}"
+        )
+    return '\n'.join(lines)
+
+
+def parse_arguments():
+    """Parse the command-line options."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes', nargs='+', choices=tuple(SIZES),
+                        default=list(DEFAULT_SIZES))
+    parser.add_argument('--workloads', nargs='+',
+                        choices=[workload.name for workload in WORKLOADS],
+                        default=None)
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='timed runs per measurement; the best is kept')
+    parser.add_argument('--output', default='benchmark_results.json',
+                        help='file to store the results in')
+    parser.add_argument('--baseline', default=None,
+                        help='results file to compare against')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='fraction of slowdown or memory growth allowed '
+                             'before a result is flagged')
+    parser.add_argument('--update-baseline', action='store_true',
+                        help='also store the results as the new baseline')
+    parser.add_argument('--data-dir', default=None,
+                        help='directory for the generated inputs')
+    arguments = parser.parse_args()
+    if arguments.update_baseline and arguments.baseline is None:
+        parser.error("--update-baseline requires --baseline")
+    return arguments
+
+
+def main():
+    """Run the suite, store the results and flag regressions."""
+    arguments = parse_arguments()
+    results = run_suite(arguments.sizes, arguments.workloads,
+                        arguments.repeat, arguments.data_dir)
+    print(format_results(results))
+    document = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+    with open(arguments.output, 'w', encoding='utf-8') as file:
+        json.dump(document, file, indent=2)
+
+    if arguments.baseline is None:
+        return 0
+    if arguments.update_baseline:
+        with open(arguments.baseline, 'w', encoding='utf-8') as file:
+            json.dump(document, file, indent=2)
+        return 0
+    with open(arguments.baseline, 'r', encoding='utf-8') as file:
+        baseline = json.load(file)['results']
+    regressions = find_regressions(results, baseline, arguments.tolerance)
+    for regression in regressions:
+        print(f"Regression: {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
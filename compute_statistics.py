@@ -4,25 +4,72 @@ standard deviation, and variance for a set of numbers provided in a text file.
 It handles multiple files and writes the computed statistics to an output file.
 """
 
-import time
+import argparse
+import contextlib
 import glob
+import heapq
+import io
+import itertools
+import math
+import os
+import tempfile
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import instrumentation
+import mapped_input
+import number_cache
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the pure-Python path is the fallback
+    np = None
+
+# Largest number of sketch levels the median error bound is guaranteed for;
+# with k items per level this covers files of up to k * 2**32 numbers.
+SKETCH_MAX_LEVELS = 32
+SPILL_BUFFER_SIZE = 1 << 20
+# Bytes a line converted in bulk by NumPy may hold; lines with any other
+# byte are converted with float() one at a time.
+NUMERIC_BYTES = b'0123456789+-.eE \t\r\x0b\x0c\x00'
+# Lines laid out and converted per NumPy call.
+ARRAY_BLOCK_SIZE = 1 << 16
+# Longest line converted in bulk, so one long line cannot widen the grid.
+MAX_BULK_WIDTH = 64
+MERGE_FAN_IN = 64
+# Distinct numbers the streaming mode keeps counts for; twice as many are
+# held before the least frequent are dropped.
+MODE_CAPACITY = 1 << 20
+
+
+def invalid_line_message(line, e):
+    """Format the diagnostic of a line that does not hold a valid number."""
+    return f"Error reading line: {line}, Error: {e}"
+
+def report_invalid_line(line_number, line, e):
+    """Report a line that does not hold a valid number."""
+    # pylint: disable=unused-argument
+    instrumentation.count('invalid_lines')
+    print(invalid_line_message(line, e))
 
+def iter_numbers(file_path_to_read, start=0, stop=None):
+    """Yield the numbers of a file one at a time, reporting invalid entries."""
+    return mapped_input.iter_numbers(file_path_to_read, float,
+                                     report_invalid_line, start, stop)
+
+@instrumentation.instrumented('compute_statistics.read_numbers')
 def read_numbers(file_path_to_read):
     """Read numbers from a file and handle invalid entries."""
-    numbers = []
-    with open(file_path_to_read, 'r', encoding='utf-8') as file:
-        for line in file:
-            try:
-                number = float(line.strip())
-                numbers.append(number)
-            except ValueError as e:
-                print(f"Error reading line: {line.strip()}, Error: {e}")
-    return numbers
+    return list(iter_numbers(file_path_to_read))
 
+@instrumentation.instrumented('compute_statistics.calculate_mean')
 def calculate_mean(numbers):
     """Calculate the mean of the numbers."""
     return sum(numbers) / len(numbers) if numbers else 0
 
+@instrumentation.instrumented('compute_statistics.calculate_median')
 def calculate_median(numbers):
     """Calculate the median of the numbers."""
     sorted_numbers = sorted(numbers)
@@ -33,17 +80,23 @@ def calculate_median(numbers):
     else:
         return (sorted_numbers[midpoint - 1] + sorted_numbers[midpoint]) / 2
 
+def mode_from_frequency(frequency):
+    """Calculate the mode from a mapping of numbers to their frequency."""
+    most_frequent = max(frequency.values())
+    mode = [number for number, freq in frequency.items() if freq == most_frequent]
+    if len(mode) == len(frequency):
+        return []  # No mode if all numbers occur equally
+    return mode
+
+@instrumentation.instrumented('compute_statistics.calculate_mode')
 def calculate_mode(numbers):
     """Calculate the mode of the numbers."""
     frequency = {}
     for number in numbers:
         frequency[number] = frequency.get(number, 0) + 1
-    most_frequent = max(frequency.values())
-    mode = [number for number, freq in frequency.items() if freq == most_frequent]
-    if len(mode) == len(set(numbers)):
-        return []  # No mode if all numbers occur equally
-    return mode
+    return mode_from_frequency(frequency)
 
+@instrumentation.instrumented('compute_statistics.calculate_variance')
 def calculate_variance(numbers, mean):
     """Calculate the variance of the numbers."""
     return sum((x - mean) ** 2 for x in numbers) / (len(numbers) - 1)
@@ -52,25 +105,360 @@ def calculate_std_dev(variance):
     """Calculate the standard deviation of the numbers."""
     return variance ** 0.5
 
-def process_file(file_path_to_process):
-    """Process a file to calculate statistics and return the results."""
-    start_time = time.time()
 
-    numbers = read_numbers(file_path_to_process)
-    if not numbers:
-        return f"File {file_path_to_process} contains no valid numbers."
+def _line_bounds(data):
+    """Return the start offset and width of every line of a byte array."""
+    newlines = np.flatnonzero(data == ord('\n'))
+    starts = np.concatenate(([0], newlines + 1))
+    ends = np.concatenate((newlines, [len(data)]))
+    if ends[-1] == starts[-1]:  # No line after the final newline
+        starts, ends = starts[:-1], ends[:-1]
+    return starts, ends - starts
 
-    mean = calculate_mean(numbers)
-    median = calculate_median(numbers)
-    mode = calculate_mode(numbers)
-    variance = calculate_variance(numbers, mean)
-    std_dev = calculate_std_dev(variance)
+def _line_grid(data, starts, widths):
+    """Lay out lines as the rows of a grid as wide as the longest, zero-padded."""
+    columns = np.arange(max(int(widths.max(initial=0)), 1))
+    grid = data[np.minimum(starts[:, None] + columns, len(data) - 1)]
+    grid[columns >= widths[:, None]] = 0
+    return grid
 
-    end_time = time.time()
-    elapsed_time = end_time - start_time
+@instrumentation.instrumented('compute_statistics.read_numbers_array')
+def read_numbers_array(file_path_to_read):
+    """Read numbers from a file in bulk into a float64 NumPy array.
+
+    Each block of lines is laid out as a fixed-width byte grid. Lines of at
+    most ``MAX_BULK_WIDTH`` bytes made only of numeric bytes are converted
+    with one ``astype`` per block; the others, and any block ``astype``
+    rejects, are converted with ``float`` line by line so invalid lines are
+    reported as ``read_numbers`` reports them.
+    """
+    data = np.fromfile(file_path_to_read, dtype=np.uint8)
+    if not len(data):
+        return np.empty(0, dtype=np.float64)
+    starts, widths = _line_bounds(data)
+    numeric_bytes = np.zeros(256, dtype=bool)
+    numeric_bytes[np.frombuffer(NUMERIC_BYTES, dtype=np.uint8)] = True
+    values = np.empty(len(starts), dtype=np.float64)
+    valid = np.ones(len(starts), dtype=bool)
+
+    for first in range(0, len(starts), ARRAY_BLOCK_SIZE):
+        block_starts = starts[first:first + ARRAY_BLOCK_SIZE]
+        block_widths = widths[first:first + ARRAY_BLOCK_SIZE]
+        candidates = np.flatnonzero(block_widths <= MAX_BULK_WIDTH)
+        grid = _line_grid(data, block_starts[candidates],
+                          block_widths[candidates])
+        numeric = numeric_bytes[grid].all(axis=1)
+        numeric &= (grid == ord('.')).sum(axis=1) <= 1
+        numeric &= ((grid | 0x20) == ord('e')).sum(axis=1) <= 1
+        lines = np.char.strip(grid.view(f'S{grid.shape[1]}').ravel())
+        numeric &= np.char.str_len(lines) > 0
+        bulk = np.zeros(len(block_starts), dtype=bool)
+        try:
+            values[first + candidates[numeric]] = (
+                lines[numeric].astype(np.float64))
+            bulk[candidates[numeric]] = True
+        except ValueError:
+            pass
+
+        for index in np.flatnonzero(~bulk).tolist():
+            start = int(block_starts[index])
+            line = data[start:start + int(block_widths[index])].tobytes()
+            line = line.strip().decode('utf-8')
+            try:
+                values[first + index] = float(line)
+            except ValueError as e:
+                valid[first + index] = False
+                report_invalid_line(first + index + 1, line, e)
+    return values if valid.all() else values[valid]
+
+@instrumentation.instrumented('compute_statistics.calculate_median_array')
+def calculate_median_array(values):
+    """Calculate the median of a NumPy array by partitioning it."""
+    n = len(values)
+    midpoint = n // 2
+    if n % 2 == 1:
+        return np.partition(values, midpoint)[midpoint].item()
+    partitioned = np.partition(values, [midpoint - 1, midpoint])
+    return ((partitioned[midpoint - 1] + partitioned[midpoint]) / 2).item()
+
+@instrumentation.instrumented('compute_statistics.calculate_mode_array')
+def calculate_mode_array(values):
+    """Calculate the mode of a NumPy array, keeping first-seen order."""
+    unique, first_index, counts = np.unique(
+        values, return_index=True, return_counts=True
+    )
+    is_mode = counts == counts.max()
+    if is_mode.all():
+        return []  # No mode if all numbers occur equally
+    order = np.argsort(first_index[is_mode], kind='stable')
+    return unique[is_mode][order].tolist()
+
+
+class QuantileSketch:
+    """
+    Mergeable approximate quantile sketch with bounded memory.
+
+    Values are kept in levels of at most ``capacity`` items; a full level is
+    sorted and every other item is promoted to the next level with twice the
+    weight. The rank of any answer is off by at most ``error * count``.
+    """
+
+    def __init__(self, error=0.001):
+        """Create a sketch whose rank error is bounded by ``error``."""
+        if not 0 < error < 1:
+            raise ValueError("The sketch error must be between 0 and 1.")
+        self.error = error
+        self.capacity = max(2, math.ceil(SKETCH_MAX_LEVELS / error))
+        self.levels = [[]]
+        self.count = 0
+        self._offset = 0
+
+    def add(self, value):
+        """Add a value to the sketch."""
+        self.levels[0].append(value)
+        self.count += 1
+        if len(self.levels[0]) >= self.capacity:
+            self._compress()
+
+    def merge(self, other):
+        """Merge another sketch with the same error bound into this one."""
+        if other.capacity != self.capacity:
+            raise ValueError("Only sketches with the same error can be merged.")
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for level, items in enumerate(other.levels):
+            self.levels[level].extend(items)
+        self.count += other.count
+        self._compress()
+
+    def _compress(self):
+        """Halve every level that has reached its capacity."""
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) >= self.capacity:
+                items.sort()
+                kept = [items.pop()] if len(items) % 2 else []
+                if level + 1 == len(self.levels):
+                    self.levels.append([])
+                self.levels[level + 1].extend(items[self._offset::2])
+                self._offset ^= 1
+                self.levels[level] = kept
+            level += 1
+
+    def value_at_rank(self, rank):
+        """Return the approximate value at a zero-based rank."""
+        weighted = sorted(
+            (value, 1 << level)
+            for level, items in enumerate(self.levels)
+            for value in items
+        )
+        seen = 0
+        for value, weight in weighted:
+            seen += weight
+            if seen > rank:
+                return value
+        return weighted[-1][0]
+
+    def median(self):
+        """Return the approximate median of the values added."""
+        n = self.count
+        if n % 2 == 1:
+            return self.value_at_rank(n // 2)
+        return (self.value_at_rank(n // 2 - 1) + self.value_at_rank(n // 2)) / 2
+
+
+class ExternalMedian:
+    """
+    Exact median over values that may not fit in memory.
+
+    Values are buffered and written to disk as sorted runs of float64 once
+    the buffer fills up; the median is found by merging the runs. At most
+    ``fan_in`` runs are open at once: when there are more, they are first
+    merged in passes into longer runs.
+    """
+
+    def __init__(self, buffer_size=SPILL_BUFFER_SIZE, directory=None,
+                 fan_in=MERGE_FAN_IN):
+        """Create a tracker spilling every ``buffer_size`` values."""
+        self.buffer_size = buffer_size
+        self.directory = directory
+        self.fan_in = max(fan_in, 2)
+        self.buffer = array('d')
+        self.runs = []
+        self.count = 0
+
+    def add(self, value):
+        """Add a value, spilling the buffer to disk when it is full."""
+        self.buffer.append(value)
+        self.count += 1
+        if len(self.buffer) >= self.buffer_size:
+            self.spill()
+
+    def merge(self, other):
+        """Take over the values and spilled runs of another tracker."""
+        self.runs.extend(other.runs)
+        other.runs = []
+        self.buffer.extend(other.buffer)
+        self.count += other.count
+        if len(self.buffer) >= self.buffer_size:
+            self.spill()
+
+    def spill(self):
+        """Write the buffered values to disk as a sorted run."""
+        if not self.buffer:
+            return
+        self.runs.append(self._write_run([array('d', sorted(self.buffer))]))
+        self.buffer = array('d')
+
+    def _write_run(self, blocks):
+        """Write sorted blocks of float64 to a new run and return its path."""
+        fd, path = tempfile.mkstemp(suffix='.run', dir=self.directory)
+        with os.fdopen(fd, 'wb') as file:
+            for block in blocks:
+                block.tofile(file)
+        return path
+
+    @staticmethod
+    def _read_run(path, block_size=SPILL_BUFFER_SIZE // 16):
+        """Yield the values of a sorted run in order."""
+        with open(path, 'rb') as file:
+            while True:
+                block = array('d')
+                try:
+                    block.fromfile(file, block_size)
+                except EOFError:
+                    pass
+                if not block:
+                    return
+                yield from block
+
+    def _sorted_values(self):
+        """Yield every value added so far in ascending order."""
+        if not self.runs:
+            return iter(sorted(self.buffer))
+        self.spill()
+        while len(self.runs) > self.fan_in:
+            paths = self.runs[:self.fan_in]
+            merged = heapq.merge(*(self._read_run(path) for path in paths))
+            blocks = iter(lambda: array('d', itertools.islice(
+                merged, SPILL_BUFFER_SIZE // 16)), array('d'))
+            self.runs.append(self._write_run(blocks))
+            del self.runs[:self.fan_in]
+            for path in paths:
+                os.remove(path)
+        return heapq.merge(*(self._read_run(path) for path in self.runs))
+
+    def median(self):
+        """Return the exact median of the values added."""
+        n = self.count
+        midpoint = n // 2
+        previous = None
+        for index, value in enumerate(self._sorted_values()):
+            if index == midpoint:
+                if n % 2 == 1:
+                    return value
+                return (previous + value) / 2
+            previous = value
+        raise ValueError("No values to compute the median from.")
+
+    def close(self):
+        """Remove the spilled runs from disk."""
+        for path in self.runs:
+            os.remove(path)
+        self.runs = []
+
+
+class StreamingStatistics:
+    """
+    Single-pass accumulator for mean, median, mode and variance.
 
-    results = (
-        f"File: {file_path_to_process}\n"
+    The mean and variance use Welford's algorithm, the mode keeps one counter
+    per distinct number, and the median is either approximate (quantile
+    sketch with a bounded error) or exact (spilling sorted runs to disk).
+
+    The mode is exact while there are at most ``2 * MODE_CAPACITY`` distinct
+    numbers. Past that, only the ``MODE_CAPACITY`` most frequent are kept,
+    so the mode becomes approximate: a kept count may be short by up to
+    ``mode_error``, and a number seen less often than that may be missed.
+    """
+
+    def __init__(self, median_error=None, spill_dir=None):
+        """Create an accumulator; ``median_error=None`` keeps the median exact."""
+        self.count = 0
+        self.total = 0.0
+        self.running_mean = 0.0
+        self.m2 = 0.0
+        self.frequency = {}
+        self.mode_error = 0
+        if median_error is None:
+            self.median_tracker = ExternalMedian(directory=spill_dir)
+        else:
+            self.median_tracker = QuantileSketch(median_error)
+
+    def add(self, number):
+        """Add a number to every accumulator."""
+        self.count += 1
+        self.total += number
+        delta = number - self.running_mean
+        self.running_mean += delta / self.count
+        self.m2 += delta * (number - self.running_mean)
+        self.frequency[number] = self.frequency.get(number, 0) + 1
+        if len(self.frequency) > 2 * MODE_CAPACITY:
+            self._prune_frequency()
+        self.median_tracker.add(number)
+
+    def merge(self, other):
+        """Merge the partial aggregates of another accumulator into this one."""
+        count = self.count + other.count
+        if other.count:
+            delta = other.running_mean - self.running_mean
+            self.running_mean += delta * other.count / count
+            self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.total += other.total
+        for number, freq in other.frequency.items():
+            self.frequency[number] = self.frequency.get(number, 0) + freq
+        self.mode_error += other.mode_error
+        if len(self.frequency) > 2 * MODE_CAPACITY:
+            self._prune_frequency()
+        self.median_tracker.merge(other.median_tracker)
+
+    def _prune_frequency(self):
+        """Keep only the ``MODE_CAPACITY`` most frequent numbers."""
+        kept = heapq.nlargest(MODE_CAPACITY, self.frequency.items(),
+                              key=lambda item: item[1])
+        # No dropped number was counted more often than the last kept one.
+        self.mode_error += kept[-1][1]
+        self.frequency = dict(kept)
+
+    def mean(self):
+        """Return the mean of the numbers added."""
+        return self.total / self.count if self.count else 0
+
+    def median(self):
+        """Return the median of the numbers added."""
+        return self.median_tracker.median()
+
+    def mode(self):
+        """Return the mode of the numbers added (see the class notes)."""
+        return mode_from_frequency(self.frequency)
+
+    def variance(self):
+        """Return the sample variance of the numbers added."""
+        return self.m2 / (self.count - 1)
+
+    def close(self):
+        """Release any disk space used by the median tracker."""
+        if isinstance(self.median_tracker, ExternalMedian):
+            self.median_tracker.close()
+
+
+def format_results(file_path, mean, median, mode, std_dev, variance,
+                   elapsed_time):
+    """Format the statistics of a file the way they are written out."""
+    return (
+        f"File: {file_path}\n"
         f"Mean: {mean}\n"
         f"Median: {median}\n"
         f"Mode: {mode}\n"
@@ -79,18 +467,341 @@ def process_file(file_path_to_process):
         f"Time Elapsed: {elapsed_time} seconds\n\n"
     )
 
-    return results
+def process_file_streaming(file_path_to_process, median_error=None,
+                           spill_dir=None):
+    """Process a file in a single pass with bounded memory."""
+    start_time = time.perf_counter()
+
+    stats = StreamingStatistics(median_error, spill_dir)
+    try:
+        for number in iter_numbers(file_path_to_process):
+            stats.add(number)
+        if not stats.count:
+            return f"File {file_path_to_process} contains no valid numbers."
+
+        mean = stats.mean()
+        median = stats.median()
+        mode = stats.mode()
+        variance = stats.variance()
+        std_dev = calculate_std_dev(variance)
+    finally:
+        stats.close()
+
+    elapsed_time = time.perf_counter() - start_time
+    return format_results(file_path_to_process, mean, median, mode, std_dev,
+                          variance, elapsed_time)
+
+def chunk_boundaries(file_path, chunks):
+    """Split a file into at most ``chunks`` byte ranges aligned to newlines."""
+    chunk_size = -(-os.path.getsize(file_path) // chunks)
+    return list(mapped_input.byte_ranges(file_path, chunk_size))
+
+@instrumentation.instrumented('compute_statistics.chunk_statistics')
+def chunk_statistics(file_path, start, stop, median_error=None,
+                     spill_dir=None):
+    """Accumulate the numbers between two byte offsets of a file.
+
+    Returns the statistics and the invalid-line diagnostics of the chunk,
+    which the parent prints in chunk order.
+    """
+    stats = StreamingStatistics(median_error, spill_dir)
+    invalid = []
+
+    def record_invalid_line(line_number, line, e):
+        # pylint: disable=unused-argument
+        instrumentation.count('invalid_lines')
+        invalid.append(invalid_line_message(line, e))
+
+    for number in mapped_input.iter_numbers(file_path, float,
+                                            record_invalid_line, start, stop):
+        stats.add(number)
+    if isinstance(stats.median_tracker, ExternalMedian):
+        stats.median_tracker.spill()
+    return stats, invalid
+
+def process_file_chunked(file_path_to_process, workers=None,
+                         median_error=None, spill_dir=None):
+    """Process one file split into newline-aligned chunks across processes."""
+    start_time = time.perf_counter()
+
+    workers = workers or os.cpu_count() or 1
+    ranges = chunk_boundaries(file_path_to_process, workers)
+    stats = StreamingStatistics(median_error, spill_dir)
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(instrumentation.collecting(chunk_statistics),
+                                file_path_to_process, start, stop,
+                                median_error, spill_dir)
+                for start, stop in ranges
+            ]
+            for future in futures:
+                (partial, invalid), tallies = future.result()
+                instrumentation.merge(tallies)
+                for message in invalid:
+                    print(message)
+                try:
+                    stats.merge(partial)
+                finally:
+                    partial.close()
+        if not stats.count:
+            return f"File {file_path_to_process} contains no valid numbers."
+
+        mean = stats.mean()
+        median = stats.median()
+        mode = stats.mode()
+        variance = stats.variance()
+        std_dev = calculate_std_dev(variance)
+    finally:
+        stats.close()
+
+    elapsed_time = time.perf_counter() - start_time
+    return format_results(file_path_to_process, mean, median, mode, std_dev,
+                          variance, elapsed_time)
+
+def resolve_backend(backend):
+    """Resolve ``'auto'`` to the best in-memory backend available."""
+    if backend == 'auto':
+        backend = 'python' if np is None else 'numpy'
+    if backend == 'numpy' and np is None:
+        raise ImportError("The numpy backend requires NumPy to be installed.")
+    return backend
+
+def calculate_statistics(numbers, backend):
+    """Calculate the mean, median, mode and variance of the numbers."""
+    if backend == 'numpy':
+        numbers = np.asarray(numbers, dtype=np.float64)
+        mean = numbers.mean().item()
+        median = calculate_median_array(numbers)
+        mode = calculate_mode_array(numbers)
+        variance = numbers.var(ddof=1).item()
+    else:
+        mean = calculate_mean(numbers)
+        median = calculate_median(numbers)
+        mode = calculate_mode(numbers)
+        variance = calculate_variance(numbers, mean)
+    return mean, median, mode, variance
+
+def process_file(file_path_to_process, backend='auto'):
+    """Process a file to calculate statistics and return the results.
+
+    ``backend`` is ``'python'``, ``'numpy'`` or ``'auto'``, which uses NumPy
+    whenever it is installed.
+    """
+    backend = resolve_backend(backend)
+    start_time = time.perf_counter()
+
+    if backend == 'numpy':
+        numbers = read_numbers_array(file_path_to_process)
+    else:
+        numbers = read_numbers(file_path_to_process)
+    instrumentation.count('numbers_read', len(numbers))
+    if len(numbers) == 0:
+        return f"File {file_path_to_process} contains no valid numbers."
+
+    mean, median, mode, variance = calculate_statistics(numbers, backend)
+    std_dev = calculate_std_dev(variance)
+
+    end_time = time.perf_counter()
+    elapsed_time = end_time - start_time
+
+    return format_results(file_path_to_process, mean, median, mode, std_dev,
+                          variance, elapsed_time)
+
+def summarize_file(file_path, backend='auto'):
+    """Parse a file and compute its statistics.
+
+    Returns a JSON-serializable summary holding the statistics, the number
+    of values and the invalid-line diagnostics.
+    """
+    backend = resolve_backend(backend)
+    invalid = []
+
+    def record_invalid_line(line_number, line, e):
+        report_invalid_line(line_number, line, e)
+        invalid.append(invalid_line_message(line, e))
+
+    numbers = array('d', mapped_input.iter_numbers(file_path, float,
+                                                   record_invalid_line))
+    summary = {'invalid': invalid, 'count': len(numbers)}
+    if numbers:
+        mean, median, mode, variance = calculate_statistics(numbers, backend)
+        summary.update(mean=mean, median=median, mode=mode,
+                       variance=variance)
+    return summary
+
+def build_cache(file_path, backend='auto'):
+    """Parse a file, compute its statistics and store them in its cache."""
+    summary = summarize_file(file_path, backend)
+    number_cache.build(file_path, summary)
+    return summary
+
+def format_summary(file_path, summary, elapsed_time):
+    """Format the results of a file from its summary."""
+    if not summary['count']:
+        return f"File {file_path} contains no valid numbers."
+    variance = summary['variance']
+    return format_results(file_path, summary['mean'], summary['median'],
+                          summary['mode'], calculate_std_dev(variance),
+                          variance, elapsed_time)
+
+def process_file_cached(file_path_to_process, backend='auto'):
+    """Process a file from its binary cache, building it when stale."""
+    start_time = time.perf_counter()
+
+    summary = number_cache.load(file_path_to_process)
+    if summary is None:
+        summary = build_cache(file_path_to_process, backend)
+    else:
+        for message in summary['invalid']:
+            print(message)
+    elapsed_time = time.perf_counter() - start_time
+    return format_summary(file_path_to_process, summary, elapsed_time)
+
+@instrumentation.instrumented('compute_statistics.run_file')
+def run_file(file_path, streaming=False, median_error=None, spill_dir=None,
+             backend='auto', cache=False):
+    """Compute the results of one file with the selected engine."""
+    if streaming:
+        return process_file_streaming(file_path, median_error, spill_dir)
+    if cache:
+        return process_file_cached(file_path, backend)
+    return process_file(file_path, backend)
+
+def _failed_results(file_path, error):
+    """Format the results of a file whose computation failed."""
+    return f"File {file_path} could not be processed: {error!r}\n\n"
+
+def run_file_collecting(file_path, options):
+    """Compute the results of one file in a worker.
+
+    Returns the results together with the diagnostics the file printed, so
+    the parent can show them in file order instead of interleaved.
+    """
+    with contextlib.redirect_stdout(io.StringIO()) as diagnostics:
+        results = run_file(file_path, **options)
+    return results, diagnostics.getvalue()
+
+def _run_isolated(file_path, options):
+    """Recompute a file in its own worker so a crash only affects it."""
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        try:
+            completed, tallies = executor.submit(
+                instrumentation.collecting(run_file_collecting), file_path,
+                options).result()
+        except Exception as error:  # pylint: disable=broad-except
+            return _failed_results(file_path, error), ''
+    instrumentation.merge(tallies)
+    return completed
+
+def process_files(file_paths, workers=None, **options):
+    """Compute the results of several files in parallel, in input order.
+
+    Yields the results of each file after printing its diagnostics. A file
+    that raises is reported in its slot of the output. When a worker dies,
+    the files that may have been running in it are retried one by one so
+    they cannot take others down, and the other unfinished files go to a
+    new pool.
+    """
+    workers = workers or os.cpu_count() or 1
+    run = instrumentation.collecting(run_file_collecting)
+    completed = {}  # Índice -> (resultados, diagnósticos)
+    next_index = 0
+    todo = list(range(len(file_paths)))
+    while todo:
+        broken = []
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(run, file_paths[index], options)
+                       for index in todo]
+            for index, future in zip(todo, futures):
+                try:
+                    completed[index], tallies = future.result()
+                    instrumentation.merge(tallies)
+                except BrokenProcessPool:
+                    broken.append(index)
+                except Exception as error:  # pylint: disable=broad-except
+                    completed[index] = (
+                        _failed_results(file_paths[index], error), '')
+                while next_index in completed:
+                    results, diagnostics = completed.pop(next_index)
+                    print(diagnostics, end='')
+                    yield results
+                    next_index += 1
+        # The pool starts files in submission order, so the worker that
+        # died held one of the first ``workers`` files that did not finish.
+        for index in broken[:workers]:
+            completed[index] = _run_isolated(file_paths[index], options)
+        todo = broken[workers:]
+        while next_index in completed:
+            results, diagnostics = completed.pop(next_index)
+            print(diagnostics, end='')
+            yield results
+            next_index += 1
+
+def parse_arguments():
+    """Parse the command-line options."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--backend', choices=('auto', 'python', 'numpy'),
+                        default='auto',
+                        help='in-memory backend (default: numpy if installed)')
+    parser.add_argument('--streaming', action='store_true',
+                        help='process each file in one pass with bounded memory')
+    parser.add_argument('--median-error', type=float, default=None,
+                        help='approximate the streaming median with this rank '
+                             'error (default: exact, spilling to disk)')
+    parser.add_argument('--spill-dir', default=None,
+                        help='directory for the exact median spill files')
+    parser.add_argument('--cache', action='store_true',
+                        help='reuse the binary cache stored next to each file')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='number of processes computing files in parallel')
+    parser.add_argument('--chunked', action='store_true',
+                        help='split each file into chunks computed by the '
+                             'workers instead of computing files in parallel')
+    instrumentation.add_arguments(parser)
+    arguments = parser.parse_args()
+    if arguments.cache and arguments.streaming:
+        # The streaming engine never reads or writes the cache.
+        parser.error("--cache cannot be combined with --streaming")
+    if arguments.chunked:
+        # Chunks are always accumulated with the streaming engine.
+        ignored = [option for option, given in (
+            ('--cache', arguments.cache),
+            ('--backend', arguments.backend != 'auto'),
+            ('--streaming', arguments.streaming),
+        ) if given]
+        if ignored:
+            parser.error(f"--chunked cannot be combined with "
+                         f"{', '.join(ignored)}")
+    return arguments
 
 # Main code to process multiple files
 if __name__ == "__main__":
-    file_paths = glob.glob('TC*.txt')
-    all_results = ""
+    arguments = parse_arguments()
+    instrumentation.enable_from_arguments(arguments)
+    file_paths = sorted(glob.glob('TC*.txt'))
+    options = {
+        'streaming': arguments.streaming,
+        'median_error': arguments.median_error,
+        'spill_dir': arguments.spill_dir,
+        'backend': arguments.backend,
+        'cache': arguments.cache,
+    }
 
-    for file_path in file_paths:
-        results = process_file(file_path)
-        all_results += results
+    if arguments.chunked:
+        all_results = (
+            process_file_chunked(file_path, arguments.workers,
+                                 arguments.median_error, arguments.spill_dir)
+            for file_path in file_paths
+        )
+    elif arguments.workers > 1:
+        all_results = process_files(file_paths, arguments.workers, **options)
+    else:
+        all_results = (run_file(file_path, **options) for file_path in file_paths)
 
-        with open('statistics_results.txt', 'a', encoding='utf-8') as doc:
+    with open('statistics_results.txt', 'a', encoding='utf-8',
+              buffering=1 << 20) as doc:
+        for results in all_results:
             doc.write(results)
-
-        print(results)
+            print(results)
+    instrumentation.finish()
@@ -3,31 +3,138 @@ Este módulo proporciona una herramienta para convertir números enteros
 de un archivo de texto a sus representaciones binarias y hexadecimales.
 """
 
+import argparse
+import itertools
+import json
 import sys
 import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+
+import instrumentation
+import mapped_input
+
+CHUNK_SIZE = 1 << 20
+DEFAULT_CACHE_SIZE = 1 << 16
+
+HEX_DIGITS = "0123456789ABCDEF"
+NIBBLE_TO_BINARY = [
+    ''.join(str((nibble >> shift) & 1) for shift in (3, 2, 1, 0))
+    for nibble in range(16)
+]
+BYTE_TO_HEX = [HEX_DIGITS[byte >> 4] + HEX_DIGITS[byte & 15] for byte in range(256)]
+BYTE_TO_BINARY = [
+    NIBBLE_TO_BINARY[byte >> 4] + NIBBLE_TO_BINARY[byte & 15] for byte in range(256)
+]
+SMALL_HEX = [digits.lstrip('0') or '0' for digits in BYTE_TO_HEX]
+SMALL_BINARY = [digits.lstrip('0') or '0' for digits in BYTE_TO_BINARY]
+
+def _number_bytes(number):
+    """Devuelve los bytes big-endian de un entero no negativo."""
+    return number.to_bytes((number.bit_length() + 7) // 8, 'big')
+
+def _digits_from_bytes(raw, byte_table):
+    """Traduce bytes con una tabla de búsqueda y quita los ceros a la izquierda."""
+    return ''.join(map(byte_table.__getitem__, raw)).lstrip('0')
 
 def convert_to_binary(number):
-    """Convierte un número entero a su representación binaria sin usar funciones incorporadas."""
-    if number == 0:
-        return "0"
-    binary_digits = []
-    while number > 0:
-        remainder = number % 2
-        binary_digits.insert(0, str(remainder))
-        number = number // 2
-    return ''.join(binary_digits)
+    """Convierte un número entero a su representación binaria sin usar funciones incorporadas.
+
+    Los negativos se representan con signo y magnitud, por ejemplo ``-101``.
+    """
+    if number < 0:
+        return '-' + convert_to_binary(-number)
+    if number < 256:
+        return SMALL_BINARY[number]
+    return _digits_from_bytes(_number_bytes(number), BYTE_TO_BINARY)
 
 def convert_to_hexadecimal(number):
-    """Convierte un número entero a su representación hexadecimal sin usar funciones incorporadas."""
-    if number == 0:
-        return "0"
-    hex_digits = []
-    hex_representation = "0123456789ABCDEF"
-    while number > 0:
-        remainder = number % 16
-        hex_digits.insert(0, hex_representation[remainder])
-        number = number // 16
-    return ''.join(hex_digits)
+    """Convierte un número entero a su representación hexadecimal sin usar funciones incorporadas.
+
+    Los negativos se representan con signo y magnitud, por ejemplo ``-1F``.
+    """
+    if number < 0:
+        return '-' + convert_to_hexadecimal(-number)
+    if number < 256:
+        return SMALL_HEX[number]
+    return _digits_from_bytes(_number_bytes(number), BYTE_TO_HEX)
+
+def convert_number(number):
+    """Convierte un entero a binario y hexadecimal extrayendo sus bytes una sola vez."""
+    if 0 <= number < 256:
+        return SMALL_BINARY[number], SMALL_HEX[number]
+    sign = ''
+    if number < 0:
+        sign = '-'
+        number = -number
+    raw = _number_bytes(number)
+    return (sign + _digits_from_bytes(raw, BYTE_TO_BINARY),
+            sign + _digits_from_bytes(raw, BYTE_TO_HEX))
+
+def convert_batch(numbers):
+    """Convierte una secuencia de enteros a una lista de pares (binario, hexadecimal)."""
+    return list(map(convert_number, numbers))
+
+class ConversionCache:
+    """Memoriza las conversiones de los enteros vistos más recientemente.
+
+    Guarda como mucho ``max_size`` pares (binario, hexadecimal) y descarta el
+    usado hace más tiempo (LRU). Los enteros entre 0 y 255 no se guardan,
+    porque ya se convierten con una sola búsqueda en tabla.
+    """
+
+    def __init__(self, max_size=DEFAULT_CACHE_SIZE):
+        """Crea una caché vacía de ``max_size`` entradas como mucho."""
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def convert(self, number):
+        """Convierte un entero como convert_number, reutilizando conversiones."""
+        if 0 <= number < 256:
+            return SMALL_BINARY[number], SMALL_HEX[number]
+        entries = self._entries
+        converted = entries.get(number)
+        if converted is not None:
+            self.hits += 1
+            entries.move_to_end(number)
+            return converted
+        self.misses += 1
+        converted = entries[number] = convert_number(number)
+        if len(entries) > self.max_size:
+            entries.popitem(last=False)
+        return converted
+
+    def load(self, file_path):
+        """Carga las conversiones guardadas con save; ignora un archivo ausente."""
+        try:
+            with open(file_path, 'r', encoding='utf-8') as file:
+                saved = json.load(file)
+        except FileNotFoundError:
+            return
+        for number, binary, hexadecimal in saved[-self.max_size:]:
+            self._entries[number] = (binary, hexadecimal)
+            self._entries.move_to_end(number)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def save(self, file_path):
+        """Guarda las conversiones en JSON, de la menos a la más reciente."""
+        with open(file_path, 'w', encoding='utf-8') as file:
+            json.dump([[number, binary, hexadecimal]
+                       for number, (binary, hexadecimal) in self._entries.items()],
+                      file)
+
+    def report(self):
+        """Imprime los aciertos y fallos de la caché."""
+        lookups = self.hits + self.misses
+        rate = self.hits / lookups if lookups else 0.0
+        print(f"Conversion cache: {self.hits} hits, {self.misses} misses "
+              f"({rate:.1%} hit rate), {len(self)} entries")
 
 def read_numbers_from_file(file_path):
     """Lee líneas de un archivo y las devuelve como generador de cadenas."""
@@ -41,40 +148,256 @@ def write_results_to_file(file_path, results):
         for result in results:
             file.write(f"{result}\n")
 
-def process_file(file_name):
+def invalid_number_message(number_str):
+    """Da formato al diagnóstico de una línea que no contiene un entero válido."""
+    return f"Invalid data: {number_str} is not a valid integer."
+
+def report_invalid_number(line_number, number_str, error):
+    """Informa de una línea que no contiene un entero válido."""
+    # pylint: disable=unused-argument
+    instrumentation.count('invalid_lines')
+    print(invalid_number_message(number_str))
+
+def read_integers_from_file(file_path):
+    """Lee los enteros de un archivo mapeado en memoria e informa de los inválidos."""
+    return mapped_input.iter_numbers(file_path, int, report_invalid_number)
+
+def iter_file_results(file_name, cache=None):
+    """Genera las líneas de resultado de un archivo sin acumularlas en memoria.
+
+    Con una ``ConversionCache`` cada valor repetido se convierte una sola vez.
+    """
+    convert = convert_number if cache is None else cache.convert
+    for number in read_integers_from_file(file_name):
+        binary, hexadecimal = convert(number)
+        yield f"Number: {number}, Binary: {binary}, Hex: {hexadecimal}"
+
+@instrumentation.instrumented('convert_numbers.process_file')
+def process_file(file_name, cache=None):
     """Procesa un archivo dado, convirtiendo cada número a binario y hexadecimal."""
     results = []
-    for number_str in read_numbers_from_file(file_name):
-        try:
-            number = int(number_str)
-            binary = convert_to_binary(number)
-            hexadecimal = convert_to_hexadecimal(number)
-            result = f"Number: {number}, Binary: {binary}, Hex: {hexadecimal}"
-            print(result)
-            results.append(result)
-        except ValueError:
-            print(f"Invalid data: {number_str} is not a valid integer.")
+    for result in iter_file_results(file_name, cache):
+        print(result)
+        results.append(result)
+    instrumentation.count('numbers_converted', len(results))
     return results
 
-def main(file_names):
-    """Procesa múltiples archivos de números y escribe los resultados en un archivo de salida."""
-    start_time = time.time()
-    all_results = []
-    
-    for file_name in file_names:
-        print(f"Processing file: {file_name}")
-        file_results = process_file(file_name)
-        all_results.extend(file_results)
-        all_results.append("\n")  # Separate the results for different files
-    
-    write_results_to_file('conversion_results.txt', all_results)
-    elapsed_time = time.time() - start_time
-    print(f"Execution time: {elapsed_time} seconds")
-    all_results.append(f"Execution time: {elapsed_time} seconds")
-    write_results_to_file('conversion_results.txt', all_results)
+_worker_cache = None  # ConversionCache de cada proceso de iter_parallel_chunks
+
+def _init_worker(cache_size):
+    """Crea la caché de conversiones que comparten los fragmentos de un proceso."""
+    global _worker_cache  # pylint: disable=global-statement
+    _worker_cache = ConversionCache(cache_size) if cache_size else None
+
+@instrumentation.instrumented('convert_numbers.convert_chunk')
+def convert_chunk(file_name, start, stop):
+    """Convierte las líneas entre dos posiciones de bytes de un archivo.
+
+    Devuelve los resultados y una lista de ``(posición, diagnóstico)`` que
+    indica ante qué resultado va cada línea inválida.
+    """
+    results = []
+    invalid = []
+    convert = convert_number if _worker_cache is None else _worker_cache.convert
+
+    def record_invalid_number(line_number, number_str, error):
+        # pylint: disable=unused-argument
+        instrumentation.count('invalid_lines')
+        invalid.append((len(results), invalid_number_message(number_str)))
+
+    for number in mapped_input.iter_numbers(file_name, int,
+                                            record_invalid_number, start, stop):
+        binary, hexadecimal = convert(number)
+        results.append(f"Number: {number}, Binary: {binary}, Hex: {hexadecimal}")
+    instrumentation.count('numbers_converted', len(results))
+    return results, invalid
+
+def iter_parallel_chunks(file_names, workers, chunk_size=CHUNK_SIZE,
+                         cache_size=0):
+    """Genera ``(archivo, fragmento)`` en el orden original, convirtiendo en paralelo.
+
+    Cada archivo empieza con un fragmento ``None``; los demás son el resultado
+    de ``convert_chunk``. Solo se adelantan unos pocos fragmentos por proceso
+    para que la memoria no crezca con el tamaño de la entrada. Con
+    ``cache_size`` cada proceso memoriza sus conversiones en una
+    ``ConversionCache`` de ese tamaño.
+    """
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(cache_size,)) as executor:
+        convert = instrumentation.collecting(convert_chunk)
+
+        def submit_tasks():
+            for file_name in file_names:
+                yield file_name, None
+                for start, stop in mapped_input.byte_ranges(file_name, chunk_size):
+                    yield file_name, executor.submit(convert, file_name,
+                                                     start, stop)
+
+        tasks = submit_tasks()
+        pending = deque(itertools.islice(tasks, workers * 2))
+        while pending:
+            file_name, future = pending.popleft()
+            pending.extend(itertools.islice(tasks, 1))
+            if future is None:
+                yield file_name, None
+                continue
+            chunk, tallies = future.result()
+            instrumentation.merge(tallies)
+            yield file_name, chunk
+
+class ProgressReporter:
+    """Informa periódicamente del rendimiento en lugar de imprimir cada línea."""
+
+    CHECK_EVERY = 4096
+
+    def __init__(self, interval=5.0):
+        """Crea un informador que escribe cada ``interval`` segundos."""
+        self.interval = interval
+        self.count = 0
+        self.unchecked = 0
+        self.start_time = time.time()
+        self.last_report = self.start_time
+
+    def update(self, count=1):
+        """Cuenta números convertidos e informa si ha pasado el intervalo."""
+        self.count += count
+        self.unchecked += count
+        if self.unchecked >= self.CHECK_EVERY:
+            self.unchecked = 0
+            now = time.time()
+            if now - self.last_report >= self.interval:
+                self.last_report = now
+                self.report(now)
+
+    def report(self, now=None):
+        """Imprime los números convertidos y su ritmo hasta ahora."""
+        elapsed = (now or time.time()) - self.start_time
+        rate = self.count / elapsed if elapsed > 0 else 0.0
+        print(f"Progress: {self.count} numbers converted ({rate:.0f} numbers/s)")
+
+@instrumentation.instrumented('convert_numbers.write_chunk')
+def write_chunk(output, chunk, output_mode, reporter):
+    """Escribe un fragmento convertido e imprime sus líneas en el orden original."""
+    results, invalid = chunk
+    if results:
+        output.write('\n'.join(results) + '\n')
+    if output_mode == 'verbose':
+        printed = 0
+        for position, message in invalid:
+            for result in results[printed:position]:
+                print(result)
+            print(message)
+            printed = position
+        for result in results[printed:]:
+            print(result)
+    else:
+        for _, message in invalid:
+            print(message)
+        if output_mode == 'progress':
+            reporter.update(len(results))
+
+def main(file_names, output_mode='verbose', progress_interval=5.0, workers=1,
+         cache_size=0, cache_file=None):
+    """Procesa múltiples archivos de números y escribe los resultados en un archivo de salida.
+
+    ``output_mode`` es ``'verbose'`` (imprime cada resultado), ``'progress'``
+    (informes periódicos de rendimiento) o ``'quiet'``. Con ``workers`` mayor
+    que 1 los archivos se convierten por fragmentos en varios procesos.
+    Con ``cache_size`` las conversiones se memorizan en una caché LRU común a
+    todos los archivos, que se carga de y se guarda en ``cache_file`` si se
+    indica. En paralelo cada proceso tiene su propia caché, que no se guarda,
+    así que ``cache_file`` no se admite con ``workers`` mayor que 1.
+    """
+    if cache_file and workers > 1:
+        raise ValueError("The cache file cannot be used with several workers.")
+    start_time = time.perf_counter()
+    reporter = ProgressReporter(progress_interval)
+    cache = None
+    if cache_size and workers <= 1:
+        cache = ConversionCache(cache_size)
+        if cache_file:
+            cache.load(cache_file)
+
+    with open('conversion_results.txt', 'w', encoding='utf-8',
+              buffering=1 << 20) as output:
+        if workers > 1:
+            started = False
+            for file_name, chunk in iter_parallel_chunks(file_names, workers,
+                                                         cache_size=cache_size):
+                if chunk is not None:
+                    write_chunk(output, chunk, output_mode, reporter)
+                    continue
+                if started:
+                    output.write("\n\n")  # Separate the results for different files
+                started = True
+                print(f"Processing file: {file_name}")
+            if started:
+                output.write("\n\n")
+        else:
+            for file_name in file_names:
+                print(f"Processing file: {file_name}")
+                with instrumentation.span('convert_numbers.convert_file'):
+                    for result in iter_file_results(file_name, cache):
+                        output.write(f"{result}\n")
+                        if output_mode == 'verbose':
+                            print(result)
+                        elif output_mode == 'progress':
+                            reporter.update()
+                output.write("\n\n")  # Separate the results for different files
+
+        if output_mode == 'progress':
+            reporter.report()
+        if cache is not None:
+            cache.report()
+            instrumentation.count('conversion_cache_hits', cache.hits)
+            instrumentation.count('conversion_cache_misses', cache.misses)
+            if cache_file:
+                cache.save(cache_file)
+        elapsed_time = time.perf_counter() - start_time
+        print(f"Execution time: {elapsed_time} seconds")
+        output.write(f"Execution time: {elapsed_time} seconds\n")
+
+def parse_arguments():
+    """Interpreta las opciones de la línea de comandos."""
+    parser = argparse.ArgumentParser(
+        usage="python convert_numbers.py [options] file_with_data1.txt "
+              "[file_with_data2.txt ...]",
+        description=__doc__,
+    )
+    parser.add_argument('file_names', nargs='+', metavar='file')
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument('--quiet', dest='output_mode', action='store_const',
+                        const='quiet', default='verbose',
+                        help='no imprimir cada resultado')
+    output.add_argument('--progress', dest='output_mode', action='store_const',
+                        const='progress',
+                        help='imprimir el rendimiento periódicamente en lugar '
+                             'de cada resultado')
+    parser.add_argument('--progress-interval', type=float, default=5.0,
+                        help='segundos entre informes de progreso')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='procesos que convierten archivos y fragmentos en '
+                             'paralelo')
+    parser.add_argument('--cache-size', type=int, default=0,
+                        help='memorizar las conversiones de hasta este número '
+                             'de valores distintos (0: sin caché)')
+    parser.add_argument('--cache-file', default=None,
+                        help='archivo donde cargar y guardar la caché de '
+                             'conversiones entre ejecuciones (sin --workers)')
+    instrumentation.add_arguments(parser)
+    arguments = parser.parse_args()
+    if arguments.cache_file and arguments.workers > 1:
+        # Each worker keeps its own cache, which is lost when it exits.
+        parser.error("--cache-file cannot be combined with --workers")
+    return arguments
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         print("Usage: python convert_numbers.py file_with_data1.txt [file_with_data2.txt ...]")
     else:
-        main(sys.argv[1:])
+        arguments = parse_arguments()
+        instrumentation.enable_from_arguments(arguments)
+        main(arguments.file_names, arguments.output_mode,
+             arguments.progress_interval, arguments.workers,
+             arguments.cache_size, arguments.cache_file)
+        instrumentation.finish()
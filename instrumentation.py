@@ -0,0 +1,251 @@
+"""
+Shared instrumentation for the tools of this repository.
+
+Phases are timed with ``perf_counter_ns`` spans and progress is tallied with
+named counters (lines read, invalid lines, bytes, records, words...). Both
+do nothing until ``enable`` is called: ``span`` then returns a shared no-op
+context manager and ``count`` returns at once, so the hooks can stay in the
+hot paths. When enabled, every span is written as one JSON line, followed
+by a summary with the counters and per-span totals when ``finish`` runs.
+cProfile and tracemalloc can be captured as well. Work submitted to worker
+processes through ``collecting`` returns its tallies with its result, and
+``merge`` adds them to the parent's summary.
+
+The tools enable it with ``--metrics FILE`` (``-`` for stderr),
+``--profile FILE`` and ``--trace-memory``; any program importing this
+module can also be instrumented by setting ``TOOLS_METRICS=FILE``.
+"""
+
+import atexit
+import cProfile
+import functools
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import Counter
+
+METRICS_VARIABLE = 'TOOLS_METRICS'
+
+
+class _State:
+    # pylint: disable=too-few-public-methods
+    """Everything recorded while instrumentation is enabled."""
+
+    def __init__(self):
+        """Start disabled."""
+        self.enabled = False
+        self.output = None
+        self.counters = Counter()
+        self.spans = {}  # Nombre -> [llamadas, nanosegundos en total]
+        self.started_ns = 0
+        self.profiler = None
+        self.profile_path = None
+        self.trace_memory = False
+
+
+_state = _State()
+
+
+class _NullSpan:
+    """Span returned while instrumentation is disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """Times the block it wraps and records it when the block ends."""
+
+    __slots__ = ('name', 'start_ns')
+
+    def __init__(self, name):
+        """Create a span called ``name``."""
+        self.name = name
+        self.start_ns = 0
+
+    def __enter__(self):
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        duration_ns = time.perf_counter_ns() - self.start_ns
+        if not _state.enabled:
+            return False
+        totals = _state.spans.setdefault(self.name, [0, 0])
+        totals[0] += 1
+        totals[1] += duration_ns
+        _emit({'type': 'span', 'name': self.name,
+               'start_ns': self.start_ns - _state.started_ns,
+               'duration_ns': duration_ns, 'ok': exc_type is None,
+               'pid': os.getpid()})
+        return False
+
+
+def is_enabled():
+    """Return whether spans and counters are being recorded."""
+    return _state.enabled
+
+
+def span(name):
+    """Return a context manager timing a phase called ``name``."""
+    if not _state.enabled:
+        return NULL_SPAN
+    return Span(name)
+
+
+def count(name, value=1):
+    """Add ``value`` to the counter ``name``."""
+    if _state.enabled:
+        _state.counters[name] += value
+
+
+def instrumented(name):
+    """Decorate a function so each call is recorded as a span."""
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _state.enabled:
+                return function(*args, **kwargs)
+            with Span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def _run_collecting(function, enabled, *args, **kwargs):
+    """Call ``function`` in a worker and return its result and tallies."""
+    if not enabled:
+        return function(*args, **kwargs), None
+    recording = _state.enabled  # Forked workers inherit the parent's state
+    _state.enabled = True
+    _state.counters = Counter()
+    _state.spans = {}
+    try:
+        result = function(*args, **kwargs)
+        tallies = {'counters': dict(_state.counters), 'spans': _state.spans}
+    finally:
+        _state.enabled = recording
+        _state.counters = Counter()
+        _state.spans = {}
+    return result, tallies
+
+
+def collecting(function):
+    """
+    Wrap ``function`` for a worker process so its tallies come back.
+
+    Calling the wrapper returns ``(result, tallies)``; pass the tallies to
+    ``merge`` in the parent. The wrapper can be pickled if ``function`` can.
+    """
+    return functools.partial(_run_collecting, function, _state.enabled)
+
+
+def merge(tallies):
+    """Add the counters and span totals returned by a worker."""
+    if not _state.enabled or not tallies:
+        return
+    _state.counters.update(tallies['counters'])
+    for name, (calls, total_ns) in tallies['spans'].items():
+        totals = _state.spans.setdefault(name, [0, 0])
+        totals[0] += calls
+        totals[1] += total_ns
+
+
+def _emit(record):
+    """Write a record as one JSON line."""
+    if _state.output is None:
+        return  # Worker only tallying for its parent
+    _state.output.write(json.dumps(record) + '\n')
+    _state.output.flush()
+
+
+def enable(metrics='-', profile=None, trace_memory=False):
+    """
+    Start recording spans and counters.
+
+    :param metrics: string, file the JSON lines are appended to, or ``-``
+        for stderr
+    :param profile: string, file to dump cProfile statistics to on finish
+        (default: no profiling)
+    :param trace_memory: bool, whether to report the peak traced memory
+    """
+    if _state.enabled:
+        finish()
+    if metrics == '-':
+        _state.output = sys.stderr
+    else:
+        # pylint: disable-next=consider-using-with
+        _state.output = open(metrics, 'a', encoding='utf-8')
+    _state.counters = Counter()
+    _state.spans = {}
+    _state.started_ns = time.perf_counter_ns()
+    _state.profile_path = profile
+    _state.trace_memory = trace_memory
+    if trace_memory:
+        tracemalloc.start()
+    if profile:
+        _state.profiler = cProfile.Profile()
+        _state.profiler.enable()
+    _state.enabled = True
+
+
+def finish():
+    """Write the summary record, stop any capture and disable recording."""
+    if not _state.enabled:
+        return
+    _state.enabled = False
+    summary = {
+        'type': 'summary',
+        'program': os.path.basename(sys.argv[0]),
+        'pid': os.getpid(),
+        'wall_ns': time.perf_counter_ns() - _state.started_ns,
+        'counters': dict(_state.counters),
+        'spans': {name: {'calls': calls, 'total_ns': total_ns}
+                  for name, (calls, total_ns) in _state.spans.items()},
+    }
+    if _state.profiler is not None:
+        _state.profiler.disable()
+        _state.profiler.dump_stats(_state.profile_path)
+        summary['profile'] = _state.profile_path
+        _state.profiler = None
+    if _state.trace_memory:
+        summary['peak_memory_bytes'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    _emit(summary)
+    if _state.output is not sys.stderr:
+        _state.output.close()
+    _state.output = None
+
+
+def add_arguments(parser):
+    """Add the instrumentation options to an argparse parser."""
+    group = parser.add_argument_group('instrumentation')
+    group.add_argument('--metrics', default=None, metavar='FILE',
+                       help='append timing spans and counters as JSON lines '
+                            'to FILE (- for stderr)')
+    group.add_argument('--profile', default=None, metavar='FILE',
+                       help='dump cProfile statistics to FILE')
+    group.add_argument('--trace-memory', action='store_true',
+                       help='report the peak memory traced by tracemalloc')
+
+
+def enable_from_arguments(arguments):
+    """Enable instrumentation if any option of ``add_arguments`` was given."""
+    if arguments.metrics or arguments.profile or arguments.trace_memory:
+        enable(arguments.metrics or '-', arguments.profile,
+               arguments.trace_memory)
+
+
+atexit.register(finish)
+if os.environ.get(METRICS_VARIABLE):
+    enable(os.environ[METRICS_VARIABLE])
@@ -0,0 +1,97 @@
+"""
+Shared reader for newline-delimited numeric files.
+
+The file is memory-mapped and converted in large blocks straight from the
+mapped bytes, so no text decoding or per-line ``str`` objects are needed on
+the common path. Only blocks containing invalid entries are walked line by
+line to report them exactly like the text-mode readers did.
+"""
+
+import mmap
+import os
+
+import instrumentation
+
+BLOCK_SIZE = 1 << 22
+
+
+def byte_ranges(file_path, chunk_size):
+    """
+    Yield ``(start, stop)`` byte ranges of about ``chunk_size`` bytes that
+    begin and end on line boundaries, so each can be read independently.
+    """
+    size = os.path.getsize(file_path)
+    start = 0
+    with open(file_path, 'rb') as file:
+        while start < size:
+            stop = start + max(1, chunk_size)
+            if stop < size:
+                file.seek(stop - 1)
+                file.readline()
+                stop = file.tell()
+            stop = min(stop, size)
+            yield start, stop
+            start = stop
+
+
+def _block_end(mapped, start, stop, block_size):
+    """Return the end of the block starting at ``start``, after a newline."""
+    end = start + block_size
+    if end >= stop:
+        return stop
+    newline = mapped.rfind(b'\n', start, end)
+    if newline == -1:
+        newline = mapped.find(b'\n', end, stop)
+        if newline == -1:
+            return stop
+    return newline + 1
+
+
+def _convert_block(lines, convert, on_invalid, first_line):
+    """Convert the lines of a block one by one, reporting invalid entries."""
+    for line_number, raw in enumerate(lines, first_line):
+        try:
+            yield convert(raw)
+        except ValueError:
+            text = raw.decode('utf-8', errors='replace').strip()
+            try:
+                yield convert(text)
+            except ValueError as error:
+                if on_invalid is not None:
+                    on_invalid(line_number, text, error)
+
+
+def iter_numbers(file_path, convert=float, on_invalid=None, start=0,
+                 stop=None, block_size=BLOCK_SIZE):
+    """
+    Yield the numbers of a memory-mapped file in order.
+
+    :param file_path: string, the path to the file to be read
+    :param convert: callable turning a line into a number, ``float`` or ``int``
+    :param on_invalid: callable receiving the line number (counted from
+        ``start``), the stripped line and the ``ValueError`` of each invalid
+        line
+    :param start: int, byte offset of the first line to read
+    :param stop: int, byte offset where reading ends (default: end of file)
+    :param block_size: int, approximate number of bytes converted at once
+    """
+    with open(file_path, 'rb') as file:
+        try:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Empty files cannot be mapped
+            return
+    with mapped:
+        stop = len(mapped) if stop is None else min(stop, len(mapped))
+        line_number = 1
+        while start < stop:
+            end = _block_end(mapped, start, stop, block_size)
+            lines = mapped[start:end].splitlines()
+            instrumentation.count('bytes_read', end - start)
+            instrumentation.count('lines_read', len(lines))
+            try:
+                yield from list(map(convert, lines))
+            except ValueError:
+                yield from _convert_block(lines, convert, on_invalid,
+                                          line_number)
+            line_number += len(lines)
+            start = end
@@ -0,0 +1,97 @@
+"""
+On-disk binary cache of the statistics of number files.
+
+Each ``TC*.txt`` gets a ``TC*.txt.numcache`` file next to it holding a JSON
+summary with the precomputed statistics and the invalid-line diagnostics of
+the source. The header records the size, modification time and BLAKE2b
+digest of the source so a stale cache is detected and rebuilt.
+
+Layout: magic, header (``HEADER``), summary JSON.
+"""
+
+import hashlib
+import json
+import os
+import struct
+
+CACHE_SUFFIX = '.numcache'
+MAGIC = b'NUMCACH2'
+HEADER = struct.Struct('<Qq32sQ')
+MTIME = struct.Struct('<q')
+MTIME_OFFSET = struct.calcsize('<Q')  # After the size in HEADER
+HASH_BLOCK_SIZE = 1 << 22
+
+
+def cache_path(source_path):
+    """Return the path of the cache belonging to a source file."""
+    return source_path + CACHE_SUFFIX
+
+
+def source_digest(source_path):
+    """Return the BLAKE2b digest of a source file."""
+    digest = hashlib.blake2b(digest_size=32)
+    with open(source_path, 'rb') as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.digest()
+
+
+def load(source_path):
+    """
+    Read the cached summary of a source file if it is still up to date.
+
+    :param source_path: string, the path of the parsed text file
+    :return: dict, or None when the cache is missing or stale
+    """
+    try:
+        stat = os.stat(source_path)
+        with open(cache_path(source_path), 'rb') as file:
+            data = file.read()
+    except OSError:
+        return None
+    try:
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError("Not a number cache.")
+        size, mtime_ns, digest, summary_size = HEADER.unpack_from(
+            data, len(MAGIC)
+        )
+        if size != stat.st_size:
+            raise ValueError("The source changed size.")
+        offset = len(MAGIC) + HEADER.size
+        if offset + summary_size != len(data):
+            raise ValueError("The cache is truncated.")
+        if mtime_ns != stat.st_mtime_ns:
+            if digest != source_digest(source_path):
+                raise ValueError("The source changed contents.")
+            _refresh_mtime(source_path, stat.st_mtime_ns)
+        return json.loads(data[offset:])
+    except (ValueError, struct.error):
+        return None
+
+
+def _refresh_mtime(source_path, mtime_ns):
+    """Record the new mtime of a source whose contents still match."""
+    try:
+        with open(cache_path(source_path), 'r+b') as file:
+            file.seek(len(MAGIC) + MTIME_OFFSET)
+            file.write(MTIME.pack(mtime_ns))
+    except OSError:
+        pass  # A read-only cache stays valid; it is only hashed again
+
+
+def build(source_path, summary):
+    """
+    Write the cache of a source file, replacing any previous one.
+
+    :param source_path: string, the path of the parsed text file
+    :param summary: dict, JSON-serializable statistics and diagnostics
+    """
+    stat = os.stat(source_path)
+    summary_bytes = json.dumps(summary).encode('utf-8')
+    header = HEADER.pack(stat.st_size, stat.st_mtime_ns,
+                         source_digest(source_path), len(summary_bytes))
+    target = cache_path(source_path)
+    temporary = f"{target}.{os.getpid()}.tmp"
+    with open(temporary, 'wb') as file:
+        file.write(MAGIC + header + summary_bytes)
+    os.replace(temporary, target)
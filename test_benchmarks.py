@@ -0,0 +1,102 @@
+"""Unit tests for the benchmark suite."""
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import benchmarks
+
+
+class TestGenerators(unittest.TestCase):
+    """Generated inputs are deterministic and of the requested size."""
+    def setUp(self):
+        """Create a directory for the generated files."""
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Remove the generated files."""
+        shutil.rmtree(self.directory)
+
+    def read_lines(self, files):
+        """Return the lines of every file."""
+        lines = []
+        for path in files:
+            with open(path, 'r', encoding='utf-8') as file:
+                lines.append(file.read().splitlines())
+        return lines
+
+    def test_same_input_for_the_same_size(self):
+        """Every workload writes the same files twice, with its item count."""
+        for workload in benchmarks.WORKLOADS:
+            with self.subTest(workload=workload.name):
+                first = os.path.join(self.directory, 'first')
+                second = os.path.join(self.directory, 'second')
+                os.mkdir(first)
+                os.mkdir(second)
+                files, items = workload.generate(first, 120)
+                again, again_items = workload.generate(second, 120)
+                self.assertEqual(self.read_lines(files),
+                                 self.read_lines(again))
+                self.assertEqual(items, again_items)
+                self.assertGreaterEqual(items, 120)
+                shutil.rmtree(first)
+                shutil.rmtree(second)
+
+    def test_line_counts(self):
+        """Line-based generators write one item per line."""
+        numbers = os.path.join(self.directory, 'numbers.txt')
+        benchmarks.generate_numbers(numbers, 500, invalid_ratio=0.1)
+        trace = os.path.join(self.directory, 'trace.jsonl')
+        benchmarks.generate_booking_trace(trace, 300, rooms=20)
+        numbers_lines = self.read_lines([numbers])[0]
+        trace_lines = self.read_lines([trace])[0]
+        self.assertEqual(len(numbers_lines), 500)
+        invalid = [line for line in numbers_lines
+                   if line in ('abc', '1.2.3', '', 'N/A')]
+        self.assertTrue(10 < len(invalid) < 100)
+        self.assertEqual(len(trace_lines), 301)
+        self.assertEqual(benchmarks.replay_booking_trace(trace), 300)
+
+
+class TestSuite(unittest.TestCase):
+    """The suite measures every workload and flags regressions."""
+    @mock.patch.dict(benchmarks.SIZES, {'tiny': 200})
+    def test_run_suite(self):
+        """Each workload gets a positive measurement at each size."""
+        results = benchmarks.run_suite(sizes=('tiny',), repeat=1)
+        self.assertEqual(set(results), {f"{workload.name}/tiny"
+                                        for workload in benchmarks.WORKLOADS})
+        for result in results.values():
+            self.assertGreater(result['items_per_second'], 0)
+            self.assertGreater(result['input_bytes'], 0)
+            self.assertGreater(result['peak_memory_bytes'], 0)
+        table = benchmarks.format_results(results).splitlines()
+        self.assertEqual(len(table), len(results) + 1)
+
+    def test_find_regressions(self):
+        """Slowdowns and memory growth beyond the tolerance are flagged."""
+        baseline = {
+            'fast/small': {'items_per_second': 100.0,
+                           'peak_memory_bytes': 1000},
+            'lean/small': {'items_per_second': 100.0,
+                           'peak_memory_bytes': 1000},
+        }
+        results = {
+            'fast/small': {'items_per_second': 79.0,
+                           'peak_memory_bytes': 1000},
+            'lean/small': {'items_per_second': 81.0,
+                           'peak_memory_bytes': 1201},
+            'new/small': {'items_per_second': 1.0,
+                          'peak_memory_bytes': 10 ** 9},
+        }
+        regressions = benchmarks.find_regressions(results, baseline, 0.2)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(regressions[0].startswith('fast/small: throughput'))
+        self.assertTrue(regressions[1].startswith('lean/small: peak memory'))
+        self.assertEqual(benchmarks.find_regressions(results, baseline, 0.5),
+                         [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,240 @@
+"""Unit tests for the readers and accumulators of compute_statistics."""
+import contextlib
+import io
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import unittest
+from unittest import mock
+
+import compute_statistics
+
+
+@unittest.skipUnless(compute_statistics.np is not None, "NumPy is required")
+class TestReadNumbersArray(unittest.TestCase):
+    """read_numbers_array must match read_numbers value for value."""
+    def setUp(self):
+        """Create a temporary file to fill in each test."""
+        fd, self.path = tempfile.mkstemp(suffix='.txt')
+        os.close(fd)
+
+    def tearDown(self):
+        """Remove the temporary file."""
+        os.remove(self.path)
+
+    def read_both(self, data):
+        """Return the values and output of both readers for ``data``."""
+        with open(self.path, 'wb') as file:
+            file.write(data)
+        expected_output = io.StringIO()
+        with contextlib.redirect_stdout(expected_output):
+            expected = compute_statistics.read_numbers(self.path)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            values = compute_statistics.read_numbers_array(self.path)
+        return (expected, expected_output.getvalue(),
+                values.tolist(), output.getvalue())
+
+    def test_valid_numbers(self):
+        """Numbers with signs, exponents and padding convert in bulk."""
+        expected, _, values, output = self.read_both(
+            b"1\n-2.5\n 3e2 \r\n+.5\n7")
+        self.assertEqual(values, expected)
+        self.assertEqual(output, "")
+
+    def test_invalid_lines_reported_in_order(self):
+        """Invalid lines are skipped and reported as read_numbers does."""
+        expected, expected_output, values, output = self.read_both(
+            b"1\nabc\n\n1.2.3\n2\n1e5e\ninf\n1_000\n-\n3\n")
+        self.assertEqual(values, expected)
+        self.assertEqual(output, expected_output)
+        self.assertEqual(output.count("Error reading line"), 5)
+
+    def test_blocks_with_invalid_lines(self):
+        """Lines of several bulk blocks keep their order and values."""
+        lines = [str(index).encode() if index % 97 else b'1..0'
+                 for index in range(3 * compute_statistics.ARRAY_BLOCK_SIZE)]
+        expected, expected_output, values, output = self.read_both(
+            b"\n".join(lines) + b"\n")
+        self.assertEqual(values, expected)
+        self.assertEqual(output, expected_output)
+
+    def test_very_long_lines(self):
+        """Lines longer than the bulk width go through float() alone."""
+        lines = [str(index).encode() for index in range(100000)]
+        lines[500] = b'x' * 20000
+        lines[700] = b'1' + b'0' * 100
+        expected, expected_output, values, output = self.read_both(
+            b"\n".join(lines))
+        self.assertEqual(values, expected)
+        self.assertEqual(output, expected_output)
+        self.assertEqual(output.count("Error reading line"), 1)
+
+    def test_empty_file(self):
+        """An empty file holds no numbers."""
+        _, _, values, output = self.read_both(b"")
+        self.assertEqual(values, [])
+        self.assertEqual(output, "")
+
+
+class TestQuantileSketch(unittest.TestCase):
+    """The sketch answers every rank within its error bound."""
+    def assert_ranks_within_bound(self, sketch, count):
+        """Check ranks of a sketch over the values 0 .. count - 1."""
+        for rank in range(0, count, count // 100):
+            self.assertLessEqual(abs(sketch.value_at_rank(rank) - rank),
+                                 sketch.error * count)
+
+    def test_error_bound(self):
+        """Ranks stay within ``error * count`` after many compressions."""
+        values = list(range(200000))
+        random.Random(1).shuffle(values)
+        sketch = compute_statistics.QuantileSketch(0.01)
+        for value in values:
+            sketch.add(value)
+        self.assertGreater(len(sketch.levels), 2)
+        self.assert_ranks_within_bound(sketch, len(values))
+        self.assertLessEqual(abs(sketch.median() - statistics.median(values)),
+                             sketch.error * len(values))
+
+    def test_merge_error_bound(self):
+        """Merged sketches keep the bound over all their values."""
+        values = list(range(100000))
+        random.Random(2).shuffle(values)
+        sketches = [compute_statistics.QuantileSketch(0.01) for _ in range(4)]
+        for index, value in enumerate(values):
+            sketches[index % 4].add(value)
+        merged = sketches[0]
+        for sketch in sketches[1:]:
+            merged.merge(sketch)
+        self.assertEqual(merged.count, len(values))
+        self.assert_ranks_within_bound(merged, len(values))
+
+    def test_invalid_error(self):
+        """Errors outside (0, 1) and mismatched merges are rejected."""
+        for error in (0, 1, -0.5):
+            with self.assertRaises(ValueError):
+                compute_statistics.QuantileSketch(error)
+        with self.assertRaises(ValueError):
+            compute_statistics.QuantileSketch(0.01).merge(
+                compute_statistics.QuantileSketch(0.1))
+
+
+class TestExternalMedian(unittest.TestCase):
+    """The spilled median is exact and leaves no runs behind."""
+    def setUp(self):
+        """Spill into a temporary directory."""
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Remove the spill directory."""
+        shutil.rmtree(self.directory)
+
+    def tracker(self):
+        """Return a tracker that spills and merges runs often."""
+        return compute_statistics.ExternalMedian(
+            buffer_size=7, directory=self.directory, fan_in=3)
+
+    def test_multi_pass_merge(self):
+        """More runs than the fan-in are merged in passes, exactly."""
+        generator = random.Random(3)
+        for count in (1, 2, 6, 7, 100, 1001):
+            with self.subTest(count=count):
+                values = [generator.uniform(-1e6, 1e6) for _ in range(count)]
+                tracker = self.tracker()
+                for value in values:
+                    tracker.add(value)
+                self.assertEqual(tracker.median(), statistics.median(values))
+                tracker.close()
+                self.assertEqual(os.listdir(self.directory), [])
+
+    def test_merge_trackers(self):
+        """Merging takes over the runs and buffer of another tracker."""
+        values = [float(value) for value in range(500)]
+        random.Random(4).shuffle(values)
+        first, second = self.tracker(), self.tracker()
+        for index, value in enumerate(values):
+            (first if index % 3 else second).add(value)
+        first.merge(second)
+        self.assertEqual(first.count, len(values))
+        self.assertEqual(first.median(), statistics.median(values))
+        first.close()
+        second.close()
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_no_values(self):
+        """The median of no values is an error."""
+        with self.assertRaises(ValueError):
+            self.tracker().median()
+
+
+class TestStreamingMode(unittest.TestCase):
+    """The streaming mode is exact until its table has to be pruned."""
+    @mock.patch.object(compute_statistics, 'MODE_CAPACITY', 4)
+    def test_pruned_mode(self):
+        """Frequent numbers survive pruning and the error is recorded."""
+        stats = compute_statistics.StreamingStatistics(median_error=0.01)
+        for number in range(1000):
+            stats.add(float(number))
+            stats.add(7.0)
+        self.assertLessEqual(len(stats.frequency), 8)
+        self.assertGreater(stats.mode_error, 0)
+        self.assertEqual(stats.mode(), [7.0])
+        self.assertLessEqual(1001 - stats.frequency[7.0], stats.mode_error)
+
+    def test_exact_mode(self):
+        """Without pruning the mode matches calculate_mode."""
+        numbers = [1.0, 2.0, 2.0, 3.0, 3.0, 4.0]
+        stats = compute_statistics.StreamingStatistics(median_error=0.01)
+        for number in numbers:
+            stats.add(number)
+        self.assertEqual(stats.mode(), compute_statistics.calculate_mode(
+            numbers))
+        self.assertEqual(stats.mode_error, 0)
+
+
+class TestChunkedMerge(unittest.TestCase):
+    """Chunks computed by workers merge into the single-pass results."""
+    def setUp(self):
+        """Write a file with invalid lines spread over every chunk."""
+        fd, self.path = tempfile.mkstemp(suffix='.txt')
+        generator = random.Random(5)
+        lines = [str(generator.randint(-50, 50)) if index % 211 else 'bad'
+                 for index in range(5000)]
+        with os.fdopen(fd, 'w') as file:
+            file.write('\n'.join(lines) + '\n')
+
+    def tearDown(self):
+        """Remove the data file."""
+        os.remove(self.path)
+
+    def run_quietly(self, function, *args):
+        """Return the results and the diagnostics of a file."""
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            results = function(self.path, *args)
+        fields = dict(line.split(': ', 1) for line in results.splitlines()
+                      if line and not line.startswith('Time Elapsed'))
+        return fields, output.getvalue()
+
+    def test_chunked_matches_single_pass(self):
+        """Every chunk count gives the statistics and messages in order."""
+        expected, expected_output = self.run_quietly(
+            compute_statistics.process_file_streaming)
+        self.assertEqual(expected_output.count("Error reading line"), 24)
+        for workers in (1, 2, 3):
+            with self.subTest(workers=workers):
+                fields, output = self.run_quietly(
+                    compute_statistics.process_file_chunked, workers)
+                self.assertEqual(output, expected_output)
+                for name in ('File', 'Median', 'Mode'):
+                    self.assertEqual(fields[name], expected[name])
+                for name in ('Mean', 'Standard Deviation', 'Variance'):
+                    self.assertAlmostEqual(float(fields[name]),
+                                           float(expected[name]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,192 @@
+"""Unit tests for the conversions and output of convert_numbers."""
+import contextlib
+import io
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import convert_numbers
+
+
+def reference_digits(number, base):
+    """Convert a non-negative integer by repeated division, as originally."""
+    if number == 0:
+        return "0"
+    digits = []
+    while number > 0:
+        digits.insert(0, "0123456789ABCDEF"[number % base])
+        number //= base
+    return ''.join(digits)
+
+
+def sample_numbers():
+    """Return small, boundary and very large non-negative integers."""
+    generator = random.Random(7)
+    numbers = list(range(600)) + [2 ** 64 - 1, 2 ** 64, 10 ** 40]
+    numbers += [generator.getrandbits(bits) for bits in range(1, 300, 7)]
+    return numbers
+
+
+class TestConversions(unittest.TestCase):
+    """Lookup-table conversions match the original digit-by-digit ones."""
+    def test_non_negative_numbers(self):
+        """Every conversion function gives the original digits."""
+        numbers = sample_numbers()
+        expected = [(reference_digits(number, 2), reference_digits(number, 16))
+                    for number in numbers]
+        self.assertEqual([(convert_numbers.convert_to_binary(number),
+                           convert_numbers.convert_to_hexadecimal(number))
+                          for number in numbers], expected)
+        self.assertEqual(convert_numbers.convert_batch(numbers), expected)
+
+    def test_negative_numbers(self):
+        """Negative numbers are written as sign and magnitude."""
+        for number in (-1, -255, -256, -(10 ** 30)):
+            self.assertEqual(convert_numbers.convert_number(number),
+                             ('-' + reference_digits(-number, 2),
+                              '-' + reference_digits(-number, 16)))
+
+
+class TestOutputFile(unittest.TestCase):
+    """conversion_results.txt is byte-identical in every mode."""
+    def setUp(self):
+        """Write the data files in a temporary working directory."""
+        self.directory = tempfile.mkdtemp()
+        self.previous_directory = os.getcwd()
+        os.chdir(self.directory)
+        numbers = sample_numbers()
+        self.files = {'first.txt': numbers[:300], 'second.txt': numbers[300:]}
+        for file_name, values in self.files.items():
+            lines = [str(value) for value in values]
+            lines[5:5] = ['abc', '', '1.5']
+            with open(file_name, 'w', encoding='utf-8') as file:
+                file.write('\n'.join(lines) + '\n')
+
+    def tearDown(self):
+        """Go back and remove the temporary directory."""
+        os.chdir(self.previous_directory)
+        shutil.rmtree(self.directory)
+
+    def expected_output(self):
+        """Return the results file the original script writes, minus time."""
+        lines = []
+        for values in self.files.values():
+            lines += [f"Number: {value}, Binary: {reference_digits(value, 2)}"
+                      f", Hex: {reference_digits(value, 16)}\n"
+                      for value in values]
+            lines.append("\n\n")
+        return ''.join(lines).encode('utf-8')
+
+    def run_main(self, **options):
+        """Run main quietly and return the results file without its time."""
+        with contextlib.redirect_stdout(io.StringIO()):
+            convert_numbers.main(list(self.files), 'quiet', **options)
+        with open('conversion_results.txt', 'rb') as file:
+            data = file.read()
+        self.assertTrue(data.endswith(b" seconds\n"))
+        return data[:data.rindex(b"Execution time: ")]
+
+    def test_every_mode_matches_original(self):
+        """Serial, cached and parallel runs write the same bytes."""
+        expected = self.expected_output()
+        for options in ({}, {'cache_size': 16}, {'workers': 2},
+                        {'workers': 2, 'cache_size': 16}):
+            with self.subTest(**options):
+                self.assertEqual(self.run_main(**options), expected)
+
+    def test_parallel_chunks_keep_order(self):
+        """Small chunks come back in file order with invalid lines placed."""
+        with contextlib.redirect_stdout(io.StringIO()):
+            serial = {file_name: list(convert_numbers.iter_file_results(
+                file_name)) for file_name in self.files}
+            chunks = list(convert_numbers.iter_parallel_chunks(
+                list(self.files), 2, chunk_size=512))
+        results = {}
+        for file_name, chunk in chunks:
+            if chunk is None:
+                results[file_name] = []
+                continue
+            converted, invalid = chunk
+            for position, _ in invalid:
+                self.assertLessEqual(position, len(converted))
+            results[file_name] += converted
+        self.assertEqual(results, serial)
+        self.assertGreater(len(chunks), 2 * len(self.files))
+
+    def test_cache_file(self):
+        """A serial run saves its cache; parallel runs reject the file."""
+        self.run_main(cache_size=16, cache_file='cache.json')
+        cache = convert_numbers.ConversionCache(16)
+        cache.load('cache.json')
+        self.assertEqual(len(cache), 16)
+        with self.assertRaises(ValueError):
+            self.run_main(workers=2, cache_size=16, cache_file='cache.json')
+        arguments = ['convert_numbers.py', 'first.txt', '--workers', '2',
+                     '--cache-file', 'cache.json']
+        with mock.patch.object(sys, 'argv', arguments), \
+                contextlib.redirect_stderr(io.StringIO()) as errors, \
+                self.assertRaises(SystemExit):
+            convert_numbers.parse_arguments()
+        self.assertIn('--cache-file cannot be combined with --workers',
+                      errors.getvalue())
+
+
+class TestConversionCache(unittest.TestCase):
+    """The cache keeps the most recently used conversions."""
+    def test_least_recently_used_is_evicted(self):
+        """Hits refresh an entry; the oldest one is dropped when full."""
+        cache = convert_numbers.ConversionCache(2)
+        for number in (300, 400, 300, 500, 400, 300):
+            self.assertEqual(cache.convert(number),
+                             convert_numbers.convert_number(number))
+        # 400 was evicted by 500, then 300 by 400 on its second miss
+        self.assertEqual((cache.hits, cache.misses), (1, 5))
+        self.assertEqual(len(cache), 2)
+
+    def test_small_numbers_bypass_the_cache(self):
+        """Values below 256 come from the lookup tables."""
+        cache = convert_numbers.ConversionCache(4)
+        for number in (0, 7, 255, 7):
+            self.assertEqual(cache.convert(number),
+                             (reference_digits(number, 2),
+                              reference_digits(number, 16)))
+        self.assertEqual((len(cache), cache.hits, cache.misses), (0, 0, 0))
+
+    def test_save_and_load(self):
+        """Saved entries load back in recency order, up to the size."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'cache.json')
+        cache = convert_numbers.ConversionCache(3)
+        for number in (1000, 2000, 3000, 1000):
+            cache.convert(number)
+        cache.save(path)
+
+        loaded = convert_numbers.ConversionCache(3)
+        loaded.load(path)
+        self.assertEqual(len(loaded), 3)
+        loaded.convert(4000)  # Evicts 2000, the least recently used
+        for number in (1000, 3000, 4000, 2000):
+            loaded.convert(number)
+        self.assertEqual((loaded.hits, loaded.misses), (3, 2))
+
+        smaller = convert_numbers.ConversionCache(2)
+        smaller.load(path)
+        for number in (3000, 1000, 2000):
+            self.assertEqual(smaller.convert(number),
+                             convert_numbers.convert_number(number))
+        self.assertEqual((smaller.hits, smaller.misses), (2, 1))
+
+    def test_missing_file_is_ignored(self):
+        """Loading a file that does not exist leaves the cache empty."""
+        cache = convert_numbers.ConversionCache(2)
+        cache.load(os.path.join(tempfile.gettempdir(), 'no-such-cache.json'))
+        self.assertEqual(len(cache), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
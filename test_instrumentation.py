@@ -0,0 +1,119 @@
+"""Unit tests for the shared instrumentation layer."""
+import argparse
+import json
+import os
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+import instrumentation
+
+
+@instrumentation.instrumented('test.square')
+def square(value):
+    """Return the square of a value, counting the call."""
+    instrumentation.count('squares')
+    return value * value
+
+
+class InstrumentationTestCase(unittest.TestCase):
+    """Writes the metrics to a temporary file."""
+    def setUp(self):
+        """Create the metrics file."""
+        fd, self.path = tempfile.mkstemp(suffix='.jsonl')
+        os.close(fd)
+
+    def tearDown(self):
+        """Stop recording and remove the metrics file."""
+        instrumentation.finish()
+        os.remove(self.path)
+
+    def records(self):
+        """Return the JSON records written so far."""
+        with open(self.path, 'r', encoding='utf-8') as file:
+            return [json.loads(line) for line in file]
+
+
+class TestDisabled(InstrumentationTestCase):
+    """Nothing is recorded until instrumentation is enabled."""
+    def test_no_op(self):
+        """Spans are the shared no-op and nothing is written."""
+        self.assertFalse(instrumentation.is_enabled())
+        self.assertIs(instrumentation.span('idle'), instrumentation.NULL_SPAN)
+        with instrumentation.span('idle'):
+            instrumentation.count('idle')
+        self.assertEqual(square(3), 9)
+        instrumentation.finish()
+        self.assertEqual(self.records(), [])
+
+
+class TestSpans(InstrumentationTestCase):
+    """Spans and counters are written as JSON lines and summarized."""
+    def test_spans_and_summary(self):
+        """Every span is a record and the summary holds the totals."""
+        instrumentation.enable(self.path)
+        self.assertTrue(instrumentation.is_enabled())
+        with instrumentation.span('outer'):
+            self.assertEqual([square(value) for value in range(3)],
+                             [0, 1, 4])
+        with self.assertRaises(ZeroDivisionError), \
+                instrumentation.span('failing'):
+            _ = 1 / 0
+        instrumentation.count('bytes', 10)
+        instrumentation.finish()
+        self.assertFalse(instrumentation.is_enabled())
+
+        *spans, summary = self.records()
+        self.assertEqual([record['name'] for record in spans],
+                         ['test.square'] * 3 + ['outer', 'failing'])
+        self.assertEqual([record['ok'] for record in spans],
+                         [True] * 4 + [False])
+        for record in spans:
+            self.assertEqual(record['type'], 'span')
+            self.assertGreaterEqual(record['duration_ns'], 0)
+            self.assertGreaterEqual(record['start_ns'], 0)
+        outer = spans[3]
+        self.assertLessEqual(outer['start_ns'], spans[0]['start_ns'])
+        self.assertEqual(summary['type'], 'summary')
+        self.assertEqual(summary['counters'], {'squares': 3, 'bytes': 10})
+        self.assertEqual(summary['spans']['test.square']['calls'], 3)
+        self.assertEqual(summary['spans']['outer']['total_ns'],
+                         outer['duration_ns'])
+
+    def test_options(self):
+        """--metrics enables recording; no option leaves it off."""
+        parser = argparse.ArgumentParser()
+        instrumentation.add_arguments(parser)
+        instrumentation.enable_from_arguments(parser.parse_args([]))
+        self.assertFalse(instrumentation.is_enabled())
+        instrumentation.enable_from_arguments(
+            parser.parse_args(['--metrics', self.path, '--trace-memory']))
+        self.assertTrue(instrumentation.is_enabled())
+        instrumentation.finish()
+        self.assertIn('peak_memory_bytes', self.records()[-1])
+
+
+class TestCollecting(InstrumentationTestCase):
+    """Tallies of work done in workers are merged into the parent."""
+    def test_worker_tallies_are_merged(self):
+        """Counters and span totals from workers reach the summary."""
+        instrumentation.enable(self.path)
+        wrapped = instrumentation.collecting(square)
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            outcomes = list(executor.map(wrapped, range(4)))
+        self.assertEqual([result for result, _ in outcomes], [0, 1, 4, 9])
+        for _, tallies in outcomes:
+            instrumentation.merge(tallies)
+        instrumentation.finish()
+        summary = self.records()[-1]
+        self.assertEqual(summary['counters'], {'squares': 4})
+        self.assertEqual(summary['spans']['test.square']['calls'], 4)
+
+    def test_disabled_collecting(self):
+        """Without recording, workers return no tallies."""
+        self.assertEqual(instrumentation.collecting(square)(5), (25, None))
+        instrumentation.merge(None)
+
+
+if __name__ == '__main__':
+    unittest.main()
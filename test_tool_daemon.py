@@ -0,0 +1,155 @@
+"""Unit tests for the spool and socket front ends of tool_daemon."""
+import json
+import os
+import shutil
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+import tool_daemon
+
+
+class DaemonTestCase(unittest.TestCase):
+    """Runs jobs on a text file in a temporary directory."""
+    def setUp(self):
+        """Create the directory, a text file and a daemon."""
+        self.directory = tempfile.mkdtemp()
+        self.text_path = os.path.join(self.directory, 'words.txt')
+        with open(self.text_path, 'w', encoding='utf-8') as file:
+            file.write('Hello world\nhello x1\n')
+        self.daemon = tool_daemon.ToolDaemon()
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        shutil.rmtree(self.directory)
+
+    def word_count_job(self):
+        """Return a word_count job for the text file."""
+        return {'tool': 'word_count', 'files': ['words.txt'],
+                'cwd': self.directory}
+
+    def assert_word_count_reply(self, reply):
+        """Check the reply of word_count_job."""
+        self.assertTrue(reply['ok'], reply)
+        self.assertTrue(reply['output'].startswith(
+            'Results for words.txt:\nhello: 2\nworld: 1\n\n'))
+        self.assertIn('Found 1 invalid tokens in words.txt',
+                      reply['messages'])
+
+
+class TestSpool(DaemonTestCase):
+    """Spooled jobs get a result file and leave no job to retry."""
+    def setUp(self):
+        """Create the spool directory."""
+        super().setUp()
+        self.spool = os.path.join(self.directory, 'spool')
+        os.mkdir(self.spool)
+
+    def drop(self, name, text):
+        """Drop a job file in the spool."""
+        with open(os.path.join(self.spool, name), 'w',
+                  encoding='utf-8') as file:
+            file.write(text)
+
+    def result(self, stem):
+        """Return the reply written for a job."""
+        with open(os.path.join(self.spool, stem + '.result'), 'r',
+                  encoding='utf-8') as file:
+            return json.load(file)
+
+    def test_jobs_are_answered(self):
+        """Good jobs are removed; bad ones are kept aside as .failed."""
+        self.drop('good.json', json.dumps(self.word_count_job()))
+        self.drop('broken.json', '{"tool": ')
+        self.drop('list.json', '["word_count"]')
+        # The CLI exits on a malformed sales file; the daemon keeps going
+        self.drop('failing.json', json.dumps(
+            {'tool': 'compute_sales', 'catalog': 'words.txt',
+             'sales': 'words.txt', 'cwd': self.directory}))
+        self.drop('pending.json.tmp', '{}')
+        tool_daemon.serve_spool(self.daemon, self.spool, once=True)
+
+        self.assert_word_count_reply(self.result('good'))
+        for stem in ('broken', 'list', 'failing'):
+            self.assertFalse(self.result(stem)['ok'])
+        self.assertIn('Invalid job', self.result('broken')['error'])
+        self.assertIn('expected a JSON object', self.result('list')['error'])
+        self.assertIn('SystemExit', self.result('failing')['error'])
+        self.assertEqual(sorted(os.listdir(self.spool)), [
+            'broken.failed', 'broken.result', 'failing.failed',
+            'failing.result', 'good.result', 'list.failed', 'list.result',
+            'pending.json.tmp',
+        ])
+
+    def test_warm_cache(self):
+        """A second job on an unchanged file reuses its counts."""
+        for name in ('first.json', 'second.json'):
+            self.drop(name, json.dumps(self.word_count_job()))
+        tool_daemon.serve_spool(self.daemon, self.spool, once=True)
+        self.assertEqual((self.daemon.cache.misses, self.daemon.cache.hits),
+                         (1, 1))
+        self.assertEqual(self.result('first')['output'].split('Total')[0],
+                         self.result('second')['output'].split('Total')[0])
+
+
+class TestSocket(DaemonTestCase):
+    """Jobs sent over a Unix socket are answered line by line."""
+    def setUp(self):
+        """Serve the daemon on a socket in a background thread."""
+        super().setUp()
+        self.socket_path = os.path.join(self.directory, 'tools.sock')
+        with open(self.socket_path, 'w', encoding='utf-8'):
+            pass  # Stale file left by a previous run
+        servers = []
+        serve_forever = socketserver.BaseServer.serve_forever
+
+        def serve_and_record(server, poll_interval=0.5):
+            # pylint: disable=unused-argument
+            servers.append(server)
+            serve_forever(server, poll_interval=0.01)
+
+        with mock.patch.object(socketserver.UnixStreamServer,
+                               'serve_forever', serve_and_record):
+            self.thread = threading.Thread(
+                target=tool_daemon.serve_socket,
+                args=(self.daemon, self.socket_path), daemon=True)
+            self.thread.start()
+            deadline = time.monotonic() + 5
+            while not servers and time.monotonic() < deadline:
+                time.sleep(0.01)
+        self.server = servers[0]
+
+    def tearDown(self):
+        """Stop the server, which removes its socket."""
+        self.server.shutdown()
+        self.thread.join(5)
+        self.assertFalse(os.path.exists(self.socket_path))
+        super().tearDown()
+
+    def test_send_job(self):
+        """send_job returns the daemon's reply."""
+        self.assert_word_count_reply(
+            tool_daemon.send_job(self.socket_path, self.word_count_job()))
+        reply = tool_daemon.send_job(self.socket_path, {'tool': 'unknown'})
+        self.assertEqual(reply, {'ok': False, 'error': 'Unknown tool: unknown'})
+
+    def test_one_reply_per_line(self):
+        """Several lines on one connection, even invalid ones, are answered."""
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.connect(self.socket_path)
+            connection.sendall(b'not json\n' + json.dumps(
+                self.word_count_job()).encode('utf-8') + b'\n')
+            connection.shutdown(socket.SHUT_WR)
+            with connection.makefile('rb') as replies:
+                first, second = [json.loads(line) for line in replies]
+        self.assertFalse(first['ok'])
+        self.assertIn('Invalid job', first['error'])
+        self.assert_word_count_reply(second)
+
+
+if __name__ == '__main__':
+    unittest.main()
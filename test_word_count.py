@@ -0,0 +1,151 @@
+"""Unit tests for the counters of word_count."""
+import contextlib
+import io
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from collections import Counter
+from unittest import mock
+
+import word_count
+
+
+def zipf_words(count, seed):
+    """Return ``count`` words whose frequencies follow a Zipf-like law."""
+    generator = random.Random(seed)
+    vocabulary = [f"word{chr(97 + index % 26)}{index}" for index in range(500)]
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    return generator.choices(vocabulary, weights, k=count)
+
+
+class TestSpaceSaving(unittest.TestCase):
+    """The sketch overestimates by at most its error bound."""
+    def test_estimates_within_bound(self):
+        """Tracked words are never undercounted nor over by the bound."""
+        words = zipf_words(20000, 1)
+        exact = Counter(words)
+        sketch = word_count.SpaceSaving(50)
+        for word in words:
+            sketch.add(word)
+        self.assertEqual(len(sketch.counts), 50)
+        bound = sketch.error_bound()
+        for word, estimate, overestimate in sketch.top(50):
+            self.assertGreaterEqual(estimate, exact[word])
+            self.assertLessEqual(estimate - exact[word], overestimate)
+            self.assertLessEqual(overestimate, bound)
+        frequent = {word for word, count in exact.items() if count > bound}
+        self.assertLessEqual(frequent, set(sketch.counts))
+
+    def test_small_streams_are_exact(self):
+        """Streams with fewer words than the capacity are counted exactly."""
+        sketch = word_count.SpaceSaving(10)
+        for word in ['b', 'a', 'b', 'c', 'b', 'a']:
+            sketch.add(word)
+        self.assertEqual(sketch.top(2), [('b', 3, 0), ('a', 2, 0)])
+
+    def test_invalid_capacity(self):
+        """A sketch must hold at least one word."""
+        with self.assertRaises(ValueError):
+            word_count.SpaceSaving(0)
+
+
+class TestSpilledWordCount(unittest.TestCase):
+    """Spilled counts match an in-memory count and leave no runs."""
+    def setUp(self):
+        """Spill into a temporary directory."""
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Remove the spill directory."""
+        shutil.rmtree(self.directory)
+
+    def test_multi_pass_merge(self):
+        """More runs than the fan-in are merged in passes, exactly."""
+        words = zipf_words(5000, 2)
+        counter = word_count.SpilledWordCount(max_words=7,
+                                              directory=self.directory,
+                                              fan_in=3)
+        for word in words:
+            counter.add(word)
+        self.assertGreater(len(counter.runs), 3)
+        self.assertEqual(list(counter.items()), sorted(Counter(words).items()))
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_without_spilling(self):
+        """Counts that fit in memory are never written to disk."""
+        counter = word_count.SpilledWordCount(directory=self.directory)
+        for word in ['b', 'a', 'b']:
+            counter.add(word)
+        self.assertEqual(list(counter.items()), [('a', 1), ('b', 2)])
+        self.assertEqual(os.listdir(self.directory), [])
+
+
+class TestCountWordsParallel(unittest.TestCase):
+    """Chunks counted by workers add up to the serial counts."""
+    def setUp(self):
+        """Write files with invalid tokens spread over every chunk."""
+        self.directory = tempfile.mkdtemp()
+        self.paths = []
+        for index in range(3):
+            path = os.path.join(self.directory, f"file{index}.txt")
+            words = zipf_words(3000, 10 + index)
+            lines = [' '.join(words[start:start + 7]) + ' x1'
+                     for start in range(0, len(words), 7)]
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write('\n'.join(lines) + '\n')
+            self.paths.append(path)
+
+    def tearDown(self):
+        """Remove the data files."""
+        shutil.rmtree(self.directory)
+
+    @staticmethod
+    def quietly(function, *args):
+        """Call a function and return its result and what it printed."""
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            result = function(*args)
+        return result, output.getvalue()
+
+    def test_matches_serial_counts(self):
+        """Counts and messages come back per file, in file order."""
+        paths = self.paths + [os.path.join(self.directory, 'missing.txt'),
+                              self.directory]
+        expected, expected_output = self.quietly(
+            lambda: [(path, dict(word_count.count_words(path)))
+                     for path in paths])
+        self.assertIn("An error occurred while processing", expected_output)
+        for chunk_size in (1000, 1 << 24):
+            with self.subTest(chunk_size=chunk_size):
+                counts, output = self.quietly(
+                    lambda size=chunk_size: [
+                        (path, dict(counts)) for path, counts in
+                        word_count.count_words_parallel(paths, 2, size)])
+                self.assertEqual(counts, expected)
+                self.assertEqual(output, expected_output)
+
+
+class TestParseArguments(unittest.TestCase):
+    """Counting modes that ignore each other are rejected."""
+    def test_conflicting_modes(self):
+        """--workers, --top-k and --max-words cannot be combined."""
+        for options in (['--workers', '2', '--top-k', '5'],
+                        ['--workers', '2', '--max-words', '5'],
+                        ['--top-k', '5', '--max-words', '5']):
+            with self.subTest(options=options), \
+                    mock.patch('sys.argv', ['word_count.py', *options, 'a']), \
+                    contextlib.redirect_stderr(io.StringIO()), \
+                    self.assertRaises(SystemExit):
+                word_count.parse_arguments()
+
+    def test_single_mode(self):
+        """One mode, or --workers 1 with another, is accepted."""
+        with mock.patch('sys.argv', ['word_count.py', '--workers', '1',
+                                     '--top-k', '5', 'a']):
+            self.assertEqual(word_count.parse_arguments().top_k, 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
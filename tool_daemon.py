@@ -0,0 +1,365 @@
+"""
+Resident worker that runs the tools of this repository without restarting.
+
+The daemon imports every tool once and keeps warm state in memory: parsed
+catalog indexes and sales records, and the parsed statistics, conversions
+and word counts of TC and text files. Each entry is keyed by the path of its
+file and reused while the file's size and modification time are unchanged.
+
+Jobs are JSON objects such as::
+
+    {"tool": "word_count", "files": ["a.txt", "b.txt"], "cwd": "/data"}
+    {"tool": "compute_sales", "catalog": "TC1/priceCatalogue.json",
+     "sales": "TC1/salesRecord.json"}
+
+They arrive one per line over a Unix socket, or as ``*.json`` files dropped
+in a spool directory. The reply carries ``output``, the text the CLI writes
+to its results file, and ``messages``, what it prints to the console.
+
+Usage:
+    python tool_daemon.py serve --socket /tmp/tools.sock
+    python tool_daemon.py serve --spool /var/spool/tools
+    python tool_daemon.py send --socket /tmp/tools.sock word_count a.txt
+"""
+
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import socket
+import socketserver
+import sys
+import time
+from collections import OrderedDict
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, 'Actividad 5.2'))
+
+# pylint: disable=wrong-import-position
+import compute_sales
+import compute_statistics
+import convert_numbers
+import word_count
+
+MAX_CACHED_FILES = 256
+SPOOL_INTERVAL = 0.05
+RESULT_FILES = {
+    'compute_statistics': ('statistics_results.txt', 'a'),
+    'convert_numbers': ('conversion_results.txt', 'w'),
+    'word_count': ('word_count_results.txt', 'w'),
+    'compute_sales': ('SalesResults.txt', 'w'),
+}
+
+
+def file_signature(path):
+    """Return the size and modification time of a file, or None."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class WarmCache:
+    """Least-recently-used cache of values derived from files.
+
+    A value is rebuilt whenever its file changes size or modification time.
+    Missing files are never cached, so a file created later is picked up.
+    """
+
+    def __init__(self, max_entries=MAX_CACHED_FILES):
+        """Create a cache holding at most ``max_entries`` values."""
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, kind, path, load):
+        """Return ``load(path)``, reusing the value while the file is unchanged."""
+        key = (kind, os.path.abspath(path))
+        signature = file_signature(path)
+        entry = self._entries.get(key)
+        if entry is not None and signature is not None and entry[0] == signature:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        value = load(path)
+        if signature is not None and file_signature(path) == signature:
+            self._entries[key] = (signature, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+
+def _quietly(function, *args):
+    """Call a function, discarding what it prints."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return function(*args)
+
+
+class ToolDaemon:
+    """Runs jobs for every tool against shared warm state."""
+
+    def __init__(self, max_entries=MAX_CACHED_FILES):
+        """Create a daemon whose cache holds ``max_entries`` files."""
+        self.cache = WarmCache(max_entries)
+        self.handlers = {
+            'compute_statistics': self.compute_statistics,
+            'convert_numbers': self.convert_numbers,
+            'word_count': self.word_count,
+            'compute_sales': self.compute_sales,
+        }
+
+    def run_job(self, job):
+        """
+        Run a job and return its reply.
+
+        :param job: dict with ``tool``, the tool's inputs and optionally
+            ``cwd``, the directory relative paths are resolved from
+        :return: dict with ``ok`` and either ``output`` and ``messages``, or
+            ``error``
+        """
+        start_time = time.perf_counter()
+        if not isinstance(job, dict):
+            return {'ok': False, 'error': "Invalid job: expected a JSON object"}
+        handler = self.handlers.get(job.get('tool'))
+        if handler is None:
+            return {'ok': False, 'error': f"Unknown tool: {job.get('tool')}"}
+        previous_directory = os.getcwd()
+        messages = io.StringIO()
+        try:
+            os.chdir(job.get('cwd', previous_directory))
+            with contextlib.redirect_stdout(messages):
+                output = handler(job)
+        # The CLIs crash or exit on some inputs; the daemon must survive them
+        except (Exception, SystemExit) as error:  # pylint: disable=broad-except
+            return {'ok': False, 'error': f"{type(error).__name__}: {error}",
+                    'messages': messages.getvalue()}
+        finally:
+            os.chdir(previous_directory)
+        return {'ok': True, 'output': output, 'messages': messages.getvalue(),
+                'seconds': time.perf_counter() - start_time}
+
+    def compute_statistics(self, job):
+        """Compute the statistics of ``files`` (default: TC*.txt)."""
+        backend = job.get('backend', 'auto')
+        output = []
+        for file_path in job.get('files') or sorted(glob.glob('TC*.txt')):
+            start_time = time.perf_counter()
+            summary = self.cache.get(
+                f'statistics:{backend}', file_path,
+                lambda path: _quietly(compute_statistics.summarize_file,
+                                      path, backend)
+            )
+            for message in summary['invalid']:
+                print(message)
+            results = compute_statistics.format_summary(
+                file_path, summary, time.perf_counter() - start_time
+            )
+            print(results)
+            output.append(results)
+        return ''.join(output)
+
+    def convert_numbers(self, job):
+        """Convert the numbers of ``files``, as ``convert_numbers --quiet``."""
+        start_time = time.perf_counter()
+        output = []
+        for file_name in job['files']:
+            print(f"Processing file: {file_name}")
+            results, invalid = self.cache.get(
+                'convert', file_name,
+                lambda path: convert_numbers.convert_chunk(path, 0, None)
+            )
+            for _, message in invalid:
+                print(message)
+            if results:
+                output.append('\n'.join(results) + '\n')
+            output.append("\n\n")
+        elapsed_time = time.perf_counter() - start_time
+        print(f"Execution time: {elapsed_time} seconds")
+        output.append(f"Execution time: {elapsed_time} seconds\n")
+        return ''.join(output)
+
+    def word_count(self, job):
+        """Count the words of ``files``."""
+        start_time = time.perf_counter()
+        output = []
+        for file_path in job['files']:
+            messages = io.StringIO()
+
+            def load(path, messages=messages):
+                with contextlib.redirect_stdout(messages):
+                    counts = word_count.count_words(path)
+                return sorted(counts.items()), messages.getvalue()
+
+            items, printed = self.cache.get('words', file_path, load)
+            sys.stdout.write(printed)
+            output.extend(word_count.iter_result_lines(file_path, items))
+        elapsed_time = time.perf_counter() - start_time
+        print("Word count for all files has been completed.")
+        print(f"Time elapsed for all files: {elapsed_time:.2f} seconds")
+        output.append(word_count.format_total_time(elapsed_time))
+        return ''.join(output)
+
+    def compute_sales(self, job):
+        """Compute the total cost of ``sales`` with the prices of ``catalog``."""
+        start_time = time.perf_counter()
+        duplicates = job.get('duplicates', 'first')
+        catalog_index = self.cache.get(
+            f'catalog:{duplicates}', job['catalog'],
+            lambda path: compute_sales.build_catalog_index(
+                compute_sales.load_data(path), duplicates
+            )
+        )
+        sales = self.cache.get('sales', job['sales'], compute_sales.load_data)
+        total_cost = compute_sales.compute_total_cost(None, sales,
+                                                      catalog_index)
+        elapsed_time = time.perf_counter() - start_time
+        print(f"Costo total de las ventas: {total_cost}")
+        print(f"Tiempo transcurrido: {elapsed_time} segundos")
+        return compute_sales.format_sales_results(total_cost, elapsed_time)
+
+
+class _JobHandler(socketserver.StreamRequestHandler):
+    """Answers each JSON line received with one JSON line."""
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                job = json.loads(line)
+            except ValueError as error:
+                reply = {'ok': False, 'error': f"Invalid job: {error}"}
+            else:
+                reply = self.server.daemon.run_job(job)
+            self.wfile.write(json.dumps(reply).encode('utf-8') + b'\n')
+            self.wfile.flush()
+
+
+def serve_socket(daemon, socket_path):
+    """Serve jobs over a Unix socket until interrupted.
+
+    Jobs are run one at a time, so a job never sees another job's output.
+    """
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    with socketserver.UnixStreamServer(socket_path, _JobHandler) as server:
+        server.daemon = daemon
+        try:
+            server.serve_forever()
+        finally:
+            os.remove(socket_path)
+
+
+def serve_spool(daemon, directory, interval=SPOOL_INTERVAL, once=False):
+    """
+    Run the ``*.json`` jobs dropped in a directory.
+
+    The reply to ``name.json`` is written atomically to ``name.result`` and
+    the job file is removed. When the job fails, or its file cannot be read
+    or parsed, the error reply is written the same way and the job file is
+    renamed to ``name.failed`` instead, so it is kept but not retried.
+    Writers should create jobs under another name and rename them to
+    ``*.json`` once complete.
+    """
+    while True:
+        for job_path in sorted(glob.glob(os.path.join(directory, '*.json'))):
+            stem = job_path[:-len('.json')]
+            try:
+                with open(job_path, 'r', encoding='utf-8') as file:
+                    job = json.load(file)
+            except (OSError, ValueError) as error:
+                reply = {'ok': False, 'error': f"Invalid job: {error}"}
+                done = _move_aside
+            else:
+                reply = daemon.run_job(job)
+                done = _move_aside if not reply['ok'] else os.remove
+            try:
+                with open(stem + '.result.tmp', 'w', encoding='utf-8') as file:
+                    json.dump(reply, file)
+                os.replace(stem + '.result.tmp', stem + '.result')
+                done(job_path)
+            except OSError as error:
+                print(f"Could not finish job {job_path}: {error}",
+                      file=sys.stderr)
+                with contextlib.suppress(OSError):
+                    _move_aside(job_path)
+        if once:
+            return
+        time.sleep(interval)
+
+
+def _move_aside(job_path):
+    """Rename a job file that failed so it is not picked up again."""
+    os.replace(job_path, job_path[:-len('.json')] + '.failed')
+
+
+def send_job(socket_path, job):
+    """Send a job to a daemon listening on a Unix socket and return its reply."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(socket_path)
+        connection.sendall(json.dumps(job).encode('utf-8') + b'\n')
+        connection.shutdown(socket.SHUT_WR)
+        with connection.makefile('rb') as reply:
+            return json.loads(reply.readline())
+
+
+def parse_arguments():
+    """Parse the command-line options."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve = commands.add_parser('serve', help='run the daemon')
+    source = serve.add_mutually_exclusive_group(required=True)
+    source.add_argument('--socket', help='Unix socket to listen on')
+    source.add_argument('--spool', help='directory to watch for job files')
+    serve.add_argument('--max-files', type=int, default=MAX_CACHED_FILES,
+                       help='files kept warm in memory')
+    send = commands.add_parser(
+        'send', help='run a job on the daemon and write its results file '
+                     'like the CLI does'
+    )
+    send.add_argument('--socket', required=True)
+    send.add_argument('tool', choices=tuple(RESULT_FILES))
+    send.add_argument('files', nargs='*',
+                      help='input files; for compute_sales, the catalog and '
+                           'the sales record')
+    return parser.parse_args()
+
+
+def main():
+    """Serve jobs or send one."""
+    arguments = parse_arguments()
+    if arguments.command == 'serve':
+        daemon = ToolDaemon(arguments.max_files)
+        try:
+            if arguments.socket:
+                serve_socket(daemon, arguments.socket)
+            else:
+                serve_spool(daemon, arguments.spool)
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    job = {'tool': arguments.tool, 'cwd': os.getcwd()}
+    if arguments.tool == 'compute_sales':
+        job['catalog'], job['sales'] = arguments.files or (
+            'TC1/priceCatalogue_default.json', 'TC1/salesRecord_default.json'
+        )
+    else:
+        job['files'] = arguments.files
+    reply = send_job(arguments.socket, job)
+    sys.stdout.write(reply.get('messages', ''))
+    if not reply['ok']:
+        print(reply['error'], file=sys.stderr)
+        return 1
+    file_name, mode = RESULT_FILES[arguments.tool]
+    with open(file_name, mode, encoding='utf-8') as file:
+        file.write(reply['output'])
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
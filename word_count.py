@@ -3,13 +3,132 @@ This module provides functionality to count occurrences of each word in one or m
 It prints out the results and writes them into a file named 'WordCountResults.txt'.
 """
 
+import argparse
+import contextlib
+import heapq
+import itertools
+import math
+import os
 import sys
+import tempfile
 import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
 
+import instrumentation
+import mapped_input
+
+CHUNK_SIZE = 1 << 24
+SPILL_WORD_LIMIT = 1 << 20
+MERGE_FAN_IN = 64
+DEFAULT_MAX_ERROR = 0.001
+SAMPLE_SIZE = 5
+
+class InvalidTokens:
+    """
+    Aggregated report of the invalid tokens found in a file.
+
+    Keeps the number of invalid tokens and the first few distinct ones as
+    samples, so messy input is summarised in one line instead of one line
+    per token.
+    """
+
+    def __init__(self):
+        """Create an empty report."""
+        self.count = 0
+        self.samples = []
+
+    def add(self, token, occurrences=1):
+        """Record ``occurrences`` of an invalid token."""
+        self.count += occurrences
+        if len(self.samples) < SAMPLE_SIZE and token not in self.samples:
+            self.samples.append(token)
+
+    def update(self, other):
+        """Add the tokens of a report for a later part of the same file."""
+        self.count += other.count
+        for token in other.samples:
+            self.add(token, 0)
+
+    def report(self, file_path):
+        """Print the summary, if any invalid token was found."""
+        if self.count:
+            print(f"Found {self.count} invalid tokens in {file_path}, "
+                  f"e.g.: {', '.join(self.samples)}")
+
+def iter_text_blocks(file, block_size=mapped_input.BLOCK_SIZE):
+    """
+    Yield the decoded text of a binary file in blocks ending at a newline.
+
+    :param file: binary file object positioned where reading should start
+    :param block_size: int, the number of bytes read at a time
+    """
+    remainder = b''
+    for block in iter(lambda: file.read(block_size), b''):
+        block = remainder + block
+        cut = block.rfind(b'\n') + 1
+        if not cut:
+            remainder = block
+            continue
+        remainder = block[cut:]
+        instrumentation.count('bytes_read', cut)
+        yield block[:cut].decode('utf-8')
+    if remainder:
+        instrumentation.count('bytes_read', len(remainder))
+        yield remainder.decode('utf-8')
+
+def count_text(text, word_count, invalid):
+    """
+    Count the words of a block of text.
+
+    The block is split on whitespace and tallied with a Counter, so the
+    validity check and lowercasing run once per distinct token instead of
+    once per occurrence. ASCII blocks are lowercased in bulk first, which
+    also merges their distinct tokens.
+
+    :param text: string, whole lines of text
+    :param word_count: Counter, updated with the alphabetic words
+    :param invalid: InvalidTokens, updated with the other tokens
+    """
+    if text.isascii():
+        text = text.lower()
+    tokens = text.split()
+    instrumentation.count('tokens', len(tokens))
+    for token, occurrences in Counter(tokens).items():
+        if token.isalpha():
+            word_count[token.lower()] += occurrences
+        else:
+            invalid.add(token, occurrences)
+
+@instrumentation.instrumented('word_count.count_words')
 def count_words(file_path):
     """
     Count the occurrence of each alphabetic word in the given file.
-    
+
+    :param file_path: string, the path to the file to be processed
+    :return: dict, a dictionary mapping words to their frequency
+    """
+    word_count = Counter()
+    invalid = InvalidTokens()
+    try:
+        with open(file_path, 'rb') as file:
+            for text in iter_text_blocks(file):
+                count_text(text, word_count, invalid)
+    except FileNotFoundError:
+        print(f"The file {file_path} was not found.")
+    except IOError as e:
+        print(f"An error occurred while processing {file_path}: {e}")
+    instrumentation.count('invalid_tokens', invalid.count)
+    invalid.report(file_path)
+    return word_count
+
+def count_words_by_line(file_path):
+    """
+    Count words line by line and token by token, printing each invalid one.
+
+    This is the original implementation of count_words, kept as the
+    baseline for benchmark().
+
     :param file_path: string, the path to the file to be processed
     :return: dict, a dictionary mapping words to their frequency
     """
@@ -28,9 +147,382 @@ def count_words(file_path):
         print(f"The file {file_path} was not found.")
     except IOError as e:
         print(f"An error occurred while processing {file_path}: {e}")
-    
+
     return word_count
 
+@instrumentation.instrumented('word_count.count_words_in_range')
+def count_words_in_range(file_path, start, stop):
+    """
+    Count the alphabetic words between two byte offsets of a file.
+
+    :param file_path: string, the path to the file to be processed
+    :param start: int, offset of the first byte, at the start of a line
+    :param stop: int, offset where the range ends, at the start of a line
+    :return: tuple, a Counter of words and the InvalidTokens of the range
+    """
+    word_count = Counter()
+    invalid = InvalidTokens()
+    with open(file_path, 'rb') as file:
+        file.seek(start)
+        data = file.read(stop - start)
+    count_text(data.decode('utf-8'), word_count, invalid)
+    return word_count, invalid
+
+def _chunk_tasks(file_paths, chunk_size):
+    """
+    Yield the byte ranges of every file, marking each file start with None.
+
+    A file that cannot be split yields its error instead of its ranges.
+    """
+    for file_path in file_paths:
+        yield file_path, None
+        try:
+            for start, stop in mapped_input.byte_ranges(file_path, chunk_size):
+                yield file_path, (start, stop)
+        except FileNotFoundError:
+            pass  # Reported at the start of the file
+        except OSError as e:
+            yield file_path, e
+
+def count_words_parallel(file_paths, workers=None, chunk_size=CHUNK_SIZE):
+    """
+    Count the words of several files across processes, per file and per chunk.
+
+    Each file is split into newline-aligned byte ranges that are counted in
+    parallel and merged in order, so invalid data is reported in file order.
+    Each file is yielded as soon as its last chunk is merged, so only one
+    file's counts are held at a time.
+
+    :param file_paths: list of strings, the files to be processed
+    :param workers: int, the number of processes (default: one per CPU)
+    :param chunk_size: int, the approximate number of bytes per chunk
+    :return: iterator of (file path, dict mapping words to their frequency)
+    """
+    workers = workers or os.cpu_count() or 1
+    current = None
+    count_range = instrumentation.collecting(count_words_in_range)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        tasks = (
+            (file_path, executor.submit(count_range, file_path, *chunk)
+             if isinstance(chunk, tuple) else chunk)
+            for file_path, chunk in _chunk_tasks(file_paths, chunk_size)
+        )
+        pending = deque(itertools.islice(tasks, workers * 2))
+        invalid = InvalidTokens()
+        while pending:
+            file_path, future = pending.popleft()
+            pending.extend(itertools.islice(tasks, 1))
+            if future is None:
+                if current is not None:
+                    invalid.report(current[0])
+                    invalid = InvalidTokens()
+                    yield current
+                current = (file_path, Counter())
+                if not os.path.exists(file_path):
+                    print(f"The file {file_path} was not found.")
+                continue
+            if isinstance(future, OSError):
+                print(f"An error occurred while processing {file_path}: "
+                      f"{future}")
+                continue
+            try:
+                (word_count, chunk_invalid), tallies = future.result()
+            except (IOError, UnicodeDecodeError) as e:
+                print(f"An error occurred while processing {file_path}: {e}")
+                continue
+            instrumentation.merge(tallies)
+            invalid.update(chunk_invalid)
+            current[1].update(word_count)
+        if current is not None:
+            invalid.report(current[0])
+            yield current
+
+def iter_words(file_path):
+    """
+    Yield the alphabetic words of a file in lower case, in file order.
+
+    Invalid tokens are reported once the whole file has been read, as
+    count_words reports them. Errors opening or reading the file propagate
+    to the caller.
+
+    :param file_path: string, the path to the file to be processed
+    """
+    invalid = InvalidTokens()
+    with open(file_path, 'rb') as file:
+        for text in iter_text_blocks(file):
+            if text.isascii():
+                text = text.lower()
+            for word in text.split():
+                if word.isalpha():
+                    yield word.lower()
+                else:
+                    invalid.add(word)
+    invalid.report(file_path)
+
+class SpaceSaving:
+    """
+    Heavy-hitters sketch that tracks at most ``capacity`` words.
+
+    When a new word arrives and the sketch is full, the word with the
+    smallest count is replaced and the newcomer inherits that count as its
+    error. Every estimate is at least the true count and exceeds it by at
+    most ``total / capacity``, so any word more frequent than that is kept.
+    """
+
+    def __init__(self, capacity):
+        """Create a sketch holding at most ``capacity`` words."""
+        if capacity < 1:
+            raise ValueError("The sketch must hold at least one word.")
+        self.capacity = capacity
+        self.total = 0
+        self.counts = {}
+        self.errors = {}
+        self._heap = []  # (count, word), with stale entries removed lazily
+
+    def add(self, word):
+        """Count one occurrence of a word."""
+        self.total += 1
+        counts = self.counts
+        heap = self._heap
+        if word in counts:
+            count = counts[word] + 1
+            counts[word] = count
+            if len(heap) > 4 * self.capacity:
+                # Demasiadas entradas obsoletas: reconstruir el montículo
+                heap[:] = [(value, key) for key, value in counts.items()]
+                heapq.heapify(heap)
+            else:
+                heapq.heappush(heap, (count, word))
+        elif len(counts) < self.capacity:
+            counts[word] = 1
+            self.errors[word] = 0
+            heapq.heappush(heap, (1, word))
+        else:
+            while counts.get(heap[0][1]) != heap[0][0]:
+                heapq.heappop(heap)  # Entrada obsoleta
+            minimum, evicted = heapq.heapreplace(heap, (heap[0][0] + 1, word))
+            del counts[evicted]
+            del self.errors[evicted]
+            counts[word] = minimum + 1
+            self.errors[word] = minimum
+
+    def error_bound(self):
+        """Return the most any estimate can exceed the true count by."""
+        return self.total // self.capacity
+
+    def top(self, k):
+        """
+        Return the ``k`` words with the highest estimated counts.
+
+        :return: list of (word, estimated count, maximum overestimate),
+                 most frequent first and ties in alphabetical order
+        """
+        items = heapq.nsmallest(k, self.counts.items(),
+                                key=lambda item: (-item[1], item[0]))
+        return [(word, count, self.errors[word]) for word, count in items]
+
+def top_words(file_path, k, capacity):
+    """
+    Estimate the ``k`` most frequent words of a file in bounded memory.
+
+    :param file_path: string, the path to the file to be processed
+    :param k: int, the number of words to return
+    :param capacity: int, the number of words the sketch may hold
+    :return: SpaceSaving, the sketch after reading the whole file
+    """
+    sketch = SpaceSaving(max(k, capacity))
+    try:
+        for word in iter_words(file_path):
+            sketch.add(word)
+    except FileNotFoundError:
+        print(f"The file {file_path} was not found.")
+    except IOError as e:
+        print(f"An error occurred while processing {file_path}: {e}")
+    return sketch
+
+class SpilledWordCount:
+    """
+    Exact word counts that may not fit in memory.
+
+    Words are counted in a dictionary until it holds ``max_words`` distinct
+    words; it is then written to disk as a run sorted by word. The full
+    counts are produced in order by merging the runs and adding up the
+    counts of equal words. At most ``fan_in`` runs are open at once: when
+    there are more, they are first merged in passes into longer runs.
+    """
+
+    def __init__(self, max_words=SPILL_WORD_LIMIT, directory=None,
+                 fan_in=MERGE_FAN_IN):
+        """Create a counter spilling every ``max_words`` distinct words."""
+        self.max_words = max_words
+        self.directory = directory
+        self.fan_in = max(fan_in, 2)
+        self.word_count = {}
+        self.runs = []
+
+    def add(self, word):
+        """Count one occurrence of a word, spilling when the dict is full."""
+        word_count = self.word_count
+        word_count[word] = word_count.get(word, 0) + 1
+        if len(word_count) >= self.max_words:
+            self.spill()
+
+    def spill(self):
+        """Write the in-memory counts to disk as a sorted run."""
+        if not self.word_count:
+            return
+        self.runs.append(self._write_run(sorted(self.word_count.items())))
+        self.word_count = {}
+
+    def _write_run(self, items):
+        """Write sorted (word, count) pairs to a new run; return its path."""
+        fd, path = tempfile.mkstemp(suffix='.words', dir=self.directory)
+        with os.fdopen(fd, 'w', encoding='utf-8') as file:
+            file.writelines(f"{word} {count}\n" for word, count in items)
+        return path
+
+    @staticmethod
+    def _read_run(path):
+        """Yield the (word, count) pairs of a sorted run in order."""
+        with open(path, 'r', encoding='utf-8') as file:
+            for line in file:
+                word, _, count = line.rpartition(' ')
+                yield word, int(count)
+
+    def _merge_runs(self, paths):
+        """Yield the summed (word, count) pairs of several runs in order."""
+        merged = heapq.merge(*(self._read_run(path) for path in paths))
+        for word, group in itertools.groupby(merged, key=lambda item: item[0]):
+            yield word, sum(count for _, count in group)
+
+    def items(self):
+        """
+        Yield every (word, count) pair sorted by word, removing the runs.
+        """
+        if not self.runs:
+            yield from sorted(self.word_count.items())
+            return
+        self.spill()
+        try:
+            while len(self.runs) > self.fan_in:
+                paths = self.runs[:self.fan_in]
+                self.runs.append(self._write_run(self._merge_runs(paths)))
+                del self.runs[:self.fan_in]
+                for path in paths:
+                    os.remove(path)
+            yield from self._merge_runs(self.runs)
+        finally:
+            for path in self.runs:
+                os.remove(path)
+            self.runs = []
+
+def count_words_spilled(file_path, max_words=SPILL_WORD_LIMIT, directory=None):
+    """
+    Count the words of a file exactly, spilling partial counts to disk.
+
+    :param file_path: string, the path to the file to be processed
+    :param max_words: int, the distinct words kept in memory before spilling
+    :param directory: string, where to write the runs (default: temp dir)
+    :return: SpilledWordCount, call items() for the sorted counts
+    """
+    counter = SpilledWordCount(max_words, directory)
+    try:
+        for word in iter_words(file_path):
+            counter.add(word)
+    except FileNotFoundError:
+        print(f"The file {file_path} was not found.")
+    except IOError as e:
+        print(f"An error occurred while processing {file_path}: {e}")
+    return counter
+
+def benchmark(file_paths, repeat=3):
+    """
+    Compare the throughput of count_words with count_words_by_line.
+
+    Output of both functions is discarded; the best of ``repeat`` runs is
+    kept for each, and their word counts are checked to be equal.
+
+    :param file_paths: list of strings, the files to be processed
+    :param repeat: int, the number of timed runs of each function
+    :return: list of (function name, megabytes per second)
+    """
+    total_bytes = sum(os.path.getsize(file_path) for file_path in file_paths)
+    results = []
+    counts = []
+    with open(os.devnull, 'w', encoding='utf-8') as devnull, \
+            contextlib.redirect_stdout(devnull):
+        for function in (count_words_by_line, count_words):
+            best = float('inf')
+            for _ in range(repeat):
+                start_time = time.perf_counter()
+                word_counts = [function(file_path) for file_path in file_paths]
+                best = min(best, time.perf_counter() - start_time)
+            counts.append([dict(word_count) for word_count in word_counts])
+            results.append((function.__name__, total_bytes / best / 1e6))
+    if counts[0] != counts[1]:
+        raise AssertionError("count_words and count_words_by_line disagree.")
+    return results
+
+def iter_result_lines(file_path, items):
+    """
+    Yield the results file lines of one file, without building them all.
+
+    :param file_path: string, the path to the processed file
+    :param items: iterable of (word, count) pairs in the order to write them
+    """
+    yield f"Results for {file_path}:\n"
+    for word, count in items:
+        yield f"{word}: {count}\n"
+    yield "\n"
+
+def format_total_time(elapsed_time):
+    """Format the closing line of the results file."""
+    return f"Total time elapsed for all files: {elapsed_time:.2f} seconds\n"
+
+def parse_arguments():
+    """
+    Parse the command-line options.
+    """
+    parser = argparse.ArgumentParser(
+        usage="python word_count.py [--workers N | --top-k K | --max-words N] "
+              "file_with_data1.txt [file_with_data2.txt ...]",
+        description=__doc__,
+    )
+    parser.add_argument('file_paths', nargs='+', metavar='file')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='count files and chunks of files in this many '
+                             'processes')
+    parser.add_argument('--top-k', type=int, default=None, metavar='K',
+                        help='write only the K most frequent words, estimated '
+                             'in bounded memory')
+    parser.add_argument('--max-error', type=float, default=DEFAULT_MAX_ERROR,
+                        help='with --top-k, the largest overcount allowed as '
+                             'a fraction of the words in the file')
+    parser.add_argument('--sketch-size', type=int, default=None,
+                        help='with --top-k, the number of words tracked '
+                             '(default: 1 / --max-error)')
+    parser.add_argument('--max-words', type=int, default=None,
+                        help='count exactly, spilling to disk whenever this '
+                             'many distinct words are in memory')
+    parser.add_argument('--spill-dir', default=None,
+                        help='directory for the runs written by --max-words')
+    parser.add_argument('--benchmark', action='store_true',
+                        help='compare the throughput of count_words with the '
+                             'original line-by-line implementation and exit')
+    instrumentation.add_arguments(parser)
+    arguments = parser.parse_args()
+    # Each mode has its own counter: none of them combine with another.
+    modes = [option for option, given in (
+        ('--workers', arguments.workers > 1),
+        ('--top-k', arguments.top_k is not None),
+        ('--max-words', arguments.max_words is not None),
+    ) if given]
+    if len(modes) > 1:
+        parser.error(f"{' and '.join(modes)} cannot be combined")
+    if arguments.sketch_size is None:
+        arguments.sketch_size = math.ceil(1 / arguments.max_error)
+    return arguments
+
 def main():
     """
     Main function to read multiple files provided as command-line arguments and count the words.
@@ -38,22 +530,52 @@ def main():
     if len(sys.argv) < 2:
         print("Usage: python word_count.py file_with_data1.txt [file_with_data2.txt ...]")
         sys.exit(1)
+    arguments = parse_arguments()
+    instrumentation.enable_from_arguments(arguments)
+    if arguments.benchmark:
+        for name, throughput in benchmark(arguments.file_paths):
+            print(f"{name}: {throughput:.1f} MB/s")
+        return
+
+    start_time = time.perf_counter()
 
-    start_time = time.time()
+    if arguments.top_k is not None:
+        with open('word_count_results.txt', 'w', encoding='utf-8') as results_file:
+            for file_path in arguments.file_paths:
+                sketch = top_words(file_path, arguments.top_k,
+                                   arguments.sketch_size)
+                bound = sketch.error_bound()
+                results_file.write(
+                    f"Top {arguments.top_k} words for {file_path} (counts may "
+                    f"exceed the true count by up to {bound}):\n"
+                )
+                for word, count, _ in sketch.top(arguments.top_k):
+                    results_file.write(f"{word}: {count}\n")
+                results_file.write("\n")
+    else:
+        if arguments.max_words is not None:
+            counts = ((file_path,
+                       count_words_spilled(file_path, arguments.max_words,
+                                           arguments.spill_dir).items())
+                      for file_path in arguments.file_paths)
+        elif arguments.workers > 1:
+            counts = ((file_path, sorted(word_count.items()))
+                      for file_path, word_count in count_words_parallel(
+                          arguments.file_paths, arguments.workers))
+        else:
+            counts = ((file_path, sorted(count_words(file_path).items()))
+                      for file_path in arguments.file_paths)
 
-    with open('word_count_results.txt', 'w', encoding='utf-8') as results_file:
-        for file_path in sys.argv[1:]:
-            word_count = count_words(file_path)
-            results_file.write(f"Results for {file_path}:\n")
-            for word, count in sorted(word_count.items()):
-                results_file.write(f"{word}: {count}\n")
-            results_file.write("\n")
+        with open('word_count_results.txt', 'w', encoding='utf-8') as results_file:
+            for file_path, items in counts:
+                results_file.writelines(iter_result_lines(file_path, items))
 
-    elapsed_time = time.time() - start_time
+    elapsed_time = time.perf_counter() - start_time
     print(f"Word count for all files has been completed.")
     print(f"Time elapsed for all files: {elapsed_time:.2f} seconds")
     with open('word_count_results.txt', 'a', encoding='utf-8') as results_file:
-        results_file.write(f"Total time elapsed for all files: {elapsed_time:.2f} seconds\n")
+        results_file.write(format_total_time(elapsed_time))
+    instrumentation.finish()
 
 if __name__ == "__main__":
     main()